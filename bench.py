@@ -0,0 +1,219 @@
+"""
+bench.py — Banc d'essai du rendu : corpus fixe, mesures comparables d'un commit à l'autre.
+
+Corpus : verset le plus court, médian et le plus long des listes curated, la
+première parabole de paraboles_curated.json et un jour de HOLY_WEEK, rendus
+par make_image, make_reel_video, make_parabole_video, make_holy_week_image et
+make_holy_week_reel. Aucun appel réseau ; l'encodage ffmpeg est optionnel.
+
+    python bench.py                          # images rendues, jamais encodées
+    python bench.py --encode                 # encodage ffmpeg + mux audio, comme en production
+    python bench.py --save bench.json        # enregistre la référence
+    python bench.py --compare bench.json     # compare à la référence (code 1 si régression)
+
+Chaque cas tourne dans un processus fils : le pic de RSS lui est propre.
+"""
+import argparse
+import contextlib
+import functools
+import io
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+# Secrets factices : bot.py et holy_week.py les lisent à l'import
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "bench")
+os.environ.setdefault("TELEGRAM_CHANNEL", "bench")
+
+import numpy as np
+
+import bot
+import holy_week
+import render
+from build_alt_indexes import load_book
+
+render.RENDER_CACHE_DIR = ""  # chaque cas est réellement rendu
+
+CURATED = [cat["file"] for cat in bot.CATEGORIES.values()]
+HOLY_DAY = "2026-04-03"  # Vendredi Saint : verset le plus long, décor le plus chargé
+
+_frames = []      # durées de render_frame du cas en cours (s)
+_encode = False
+_render_video = render.render_video
+_render_segments = render.render_segments
+
+
+def _timed(timeline):
+    """La même timeline, chaque appel à render_frame chronométré."""
+    def timed(f):
+        t0 = time.perf_counter()
+        frame = timeline.render_frame(f)
+        _frames.append(time.perf_counter() - t0)
+        return frame
+    return render.Timeline(timed, timeline.total, timeline.W, timeline.H, timeline.fps)
+
+
+def _timed_render_video(timeline, outputs, audio=None, audio_ss=2, workers=None, sinks=()):
+    """Remplace render_video : chronomètre chaque image, puis l'encode ou la jette (les sinks sont servis)."""
+    timed_tl = _timed(timeline)
+    if _encode:
+        # Un seul processus : les durées par image restent mesurées ici
+        return _render_video(timed_tl, outputs, audio, audio_ss, workers=1, sinks=sinks)
+    for f, frame in timed_tl:
+        for s in sinks:
+            if s.want(f):
+                s.write(frame, f)
+    for s in sinks:
+        s.close()
+    return outputs
+
+
+def _timed_render_segments(timeline, outputs, segments, audio=None, audio_ss=2, workers=None):
+    """Remplace render_segments : mêmes mesures que _timed_render_video, segments encodés un à un."""
+    if _encode:
+        return _render_segments(_timed(timeline), outputs, segments, audio, audio_ss, workers=1)
+    return _timed_render_video(timeline, outputs, audio, audio_ss)
+
+
+def _timed_save(save):
+    """Image fixe : tout le rendu compte pour une seule « image »."""
+    def run(*args):
+        t0 = time.perf_counter()
+        out = save(*args)
+        _frames.append(time.perf_counter() - t0)
+        return out
+    return run
+
+
+def verse_corpus():
+    """Versets court, médian et long (après nettoyage) de toutes les listes curated."""
+    books, texts = {}, []
+    for path in CURATED:
+        for book, ch, v in bot.load_json(path):
+            if book not in books:
+                books[book] = load_book(book)
+            text = bot.clean_text(bot.strip_rubric(books[book][str(ch)][str(v)]))
+            texts.append((len(text), text, f"{book} {ch}:{v}"))
+    texts.sort()
+    return {"short": texts[0][1:], "median": texts[len(texts)//2][1:], "long": texts[-1][1:]}
+
+
+@functools.lru_cache(maxsize=None)
+def cases():
+    """{nom: (fonction, arguments)} — la liste complète du corpus."""
+    out = {}
+    for label, (text, ref) in verse_corpus().items():
+        out[f"image_{label}"] = (_timed_save(bot.make_image), (text, ref))
+        out[f"reel_{label}"] = (bot.make_reel_video, (text, ref))
+    parabole = bot.load_json("paraboles_curated.json")[0]
+    out["parabole"] = (bot.make_parabole_video, (parabole["title"], [(v["ref"], v["text"]) for v in parabole["verses"]]))
+    day = holy_week.HOLY_WEEK[HOLY_DAY]
+    out["holy_week_image"] = (_timed_save(holy_week.make_holy_week_image), (day,))
+    out["holy_week_reel"] = (holy_week.make_holy_week_reel, (day,))
+    return out
+
+
+def _paths(result):
+    if isinstance(result, dict):
+        return list(result.values())
+    return [result] if isinstance(result, str) else []
+
+
+def run_case(name):
+    """Rend un cas (dans le processus fils) et retourne ses mesures."""
+    fn, args = cases()[name]
+    _frames.clear()
+    started = time.time()
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # journaux de rendu muets : stdout reste du JSON
+        result = fn(*args)
+    wall = time.perf_counter() - t0
+    # Seuls les fichiers écrits par ce rendu comptent. Sans --encode, une vidéo n'existe
+    # pas : la taille d'un cas n'est mesurée que si toutes ses sorties ont été écrites
+    # (sinon la couverture seule passerait pour la taille de la vidéo).
+    outputs = _paths(result)
+    paths = [p for p in outputs if os.path.exists(p) and os.path.getmtime(p) >= started - 1]
+    size = sum(os.path.getsize(p) for p in paths) if paths and len(paths) == len(outputs) else None
+    for p in paths:
+        os.remove(p)
+    ms = np.array(_frames) * 1000
+    return {
+        "frames":        len(ms),
+        "frame_mean_ms": round(float(ms.mean()), 3) if len(ms) else None,
+        "frame_p95_ms":  round(float(np.percentile(ms, 95)), 3) if len(ms) else None,
+        "wall_s":        round(wall, 3),
+        "peak_rss_mb":   round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "output_bytes":  size,
+    }
+
+
+def _init(encode):
+    global _encode
+    _encode = encode
+    render.render_video = holy_week.render_video = _timed_render_video
+    render.render_segments = _timed_render_segments
+
+
+def run(names, encode):
+    ctx = multiprocessing.get_context("fork")
+    results = {}
+    for name in names:
+        with ctx.Pool(1, initializer=_init, initargs=(encode,)) as pool:
+            results[name] = pool.apply(run_case, (name,))
+        r = results[name]
+        print(f"⏱️  {name:<16} {r['frames']:>4} img  moy {r['frame_mean_ms']:>8} ms  p95 {r['frame_p95_ms']:>8} ms"
+              f"  total {r['wall_s']:>7} s  RSS {r['peak_rss_mb']:>6} Mo", file=sys.stderr)
+    return {"encode": encode, "cases": results}
+
+
+# Métriques comparées : une hausse au-delà de la tolérance est une régression
+COMPARED = ("frame_mean_ms", "frame_p95_ms", "wall_s", "peak_rss_mb", "output_bytes")
+
+
+def compare(current, baseline, tolerance):
+    """Écarts relatifs par cas et par métrique ; retourne la liste des régressions."""
+    report, regressions = {}, []
+    for name, cur in current["cases"].items():
+        ref = baseline["cases"].get(name)
+        if not ref:
+            continue
+        report[name] = {}
+        for m in COMPARED:
+            if cur.get(m) is None or not ref.get(m):
+                continue
+            delta = cur[m] / ref[m] - 1
+            report[name][m] = {"baseline": ref[m], "current": cur[m], "delta": round(delta, 4)}
+            if delta > tolerance:
+                regressions.append(f"{name}.{m} +{delta:.1%}")
+    return report, regressions
+
+
+def main():
+    p = argparse.ArgumentParser(description="Banc d'essai du rendu (bot.py, holy_week.py)")
+    p.add_argument("cases", nargs="*", help="cas à lancer (défaut : tous)")
+    p.add_argument("--encode", action="store_true", help="encoder réellement avec ffmpeg (mux audio compris)")
+    p.add_argument("--save", metavar="FICHIER", help="enregistrer les résultats comme référence")
+    p.add_argument("--compare", metavar="FICHIER", help="comparer à une référence enregistrée")
+    p.add_argument("--tolerance", type=float, default=0.10, help="hausse relative tolérée (défaut 0.10)")
+    args = p.parse_args()
+
+    names = args.cases or list(cases())
+    unknown = set(names) - set(cases())
+    if unknown:
+        p.error(f"cas inconnus : {', '.join(sorted(unknown))}")
+    results = run(names, args.encode)
+    if args.save:
+        bot.save_json(args.save, results)
+    if args.compare:
+        results["comparison"], regressions = compare(results, bot.load_json(args.compare), args.tolerance)
+        results["regressions"] = regressions
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    if args.compare and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+bible_pack.py — Corpus LSG 1910 empaqueté : un seul fichier binaire, lu par mmap.
+
+Les 66 bible/<livre>.json sont réunis dans PACK_FILE : des tables d'offsets à
+largeur fixe indexées par (livre, chapitre, verset), puis le texte UTF-8 de
+tous les versets bout à bout. verse() ne fait que deux lectures d'entiers et
+une tranche dans le fichier mappé : rien n'est parsé, rien n'est chargé.
+
+Chaque livre garde l'empreinte SHA-1 de son JSON source : fresh() la compare
+(une fois par livre et par processus) pour qu'un JSON modifié sans reconstruire
+le paquet ne serve pas l'ancien texte.
+
+    python bible_pack.py      # (re)construit bible/lsg1910.bin (aussi fait par build_bible.py)
+
+Format (entiers little-endian non signés de 32 bits) :
+    MAGIC, nb livres, nb chapitres, nb versets
+    livres    : nb livres × (nom UTF-8 sur NAME_BYTES octets, SHA-1 du JSON, 1er chapitre, nb chapitres)
+    chapitres : nb chapitres × (1er verset, nb versets)
+    offsets   : (nb versets + 1) × début du verset dans le texte
+    texte     : UTF-8 ; un verset absent de la source est une tranche vide
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+from build_bible import BOOK_MAP, OUT_DIR, safe_filename
+
+PACK_FILE  = os.path.join(OUT_DIR, "lsg1910.bin")
+MAGIC      = b"LSG1910\x02"
+NAME_BYTES = 32
+
+HEADER  = struct.Struct(f"<{len(MAGIC)}s3I")
+BOOK    = struct.Struct(f"<{NAME_BYTES}s20s2I")
+CHAPTER = struct.Struct("<2I")
+OFFSET  = struct.Struct("<I")
+
+
+# ---------------------------------------------------
+# CONSTRUCTION
+# ---------------------------------------------------
+def build(src_dir=OUT_DIR, path=PACK_FILE):
+    """Empaquette les livres présents dans src_dir, dans l'ordre canonique de BOOK_MAP."""
+    books, chapters, offsets, blob = [], [], [0], bytearray()
+    for name in BOOK_MAP.values():
+        src = os.path.join(src_dir, safe_filename(name) + ".json")
+        if not os.path.exists(src):
+            continue
+        with open(src, "rb") as f:
+            raw = f.read()
+        data = json.loads(raw.decode("utf-8"))[name]
+        books.append((name.encode("utf-8"), hashlib.sha1(raw).digest(), len(chapters), max(map(int, data))))
+        for ch in range(1, books[-1][3] + 1):
+            verses = data.get(str(ch), {})
+            count = max(map(int, verses), default=0)
+            chapters.append((len(offsets) - 1, count))
+            for v in range(1, count + 1):
+                blob += verses.get(str(v), "").encode("utf-8")
+                offsets.append(len(blob))
+    if not books:
+        raise RuntimeError(f"Aucun livre dans {src_dir}/")
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(books), len(chapters), len(offsets) - 1))
+        for book in books:
+            f.write(BOOK.pack(*book))
+        for first, count in chapters:
+            f.write(CHAPTER.pack(first, count))
+        f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        f.write(blob)
+    os.replace(tmp, path)
+    print(f"📦 {path} : {len(books)} livres, {len(offsets) - 1} versets, {os.path.getsize(path)} octets")
+    return path
+
+
+# ---------------------------------------------------
+# LECTURE — utilisée par bot.py
+# ---------------------------------------------------
+_pack = None   # (mmap, {nom: id}, début des chapitres, des offsets, du texte)
+_fresh = {}    # id du livre → le paquet correspond-il encore au JSON source ?
+
+
+def available():
+    return _pack is not None or os.path.exists(PACK_FILE)
+
+
+def _open():
+    global _pack
+    if _pack is None:
+        with open(PACK_FILE, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n_books, n_chapters, n_verses = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{PACK_FILE} : format inconnu")
+        names = {}
+        for i in range(n_books):
+            name = BOOK.unpack_from(mm, HEADER.size + i * BOOK.size)[0].rstrip(b"\0").decode("utf-8")
+            names[name] = i
+            names.setdefault(name.lower(), i)
+        chapters = HEADER.size + n_books * BOOK.size
+        offsets = chapters + n_chapters * CHAPTER.size
+        _pack = (mm, names, chapters, offsets, offsets + (n_verses + 1) * OFFSET.size)
+    return _pack
+
+
+def fresh(book_name, src_dir=OUT_DIR):
+    """
+    Faux si le JSON source du livre a changé depuis l'empaquetage (l'appelant lit
+    alors le JSON). Un livre inconnu ou sans source reste servi par le paquet.
+    """
+    mm, names = _open()[:2]
+    book = names.get(book_name, names.get(book_name.lower()))
+    if book is None:
+        return True
+    if book not in _fresh:
+        name, digest = BOOK.unpack_from(mm, HEADER.size + book * BOOK.size)[:2]
+        src = os.path.join(src_dir, safe_filename(name.rstrip(b"\0").decode("utf-8")) + ".json")
+        if os.path.exists(src):
+            with open(src, "rb") as f:
+                _fresh[book] = hashlib.sha1(f.read()).digest() == digest
+        else:
+            _fresh[book] = True
+        if not _fresh[book]:
+            print(f"⚠️  {PACK_FILE} périmé pour {book_name} : lecture du JSON (python bible_pack.py)")
+    return _fresh[book]
+
+
+def verse(book_name, chapter, verse):
+    """Texte brut d'un verset ; KeyError si le livre, le chapitre ou le verset n'existe pas."""
+    mm, names, chapters, offsets, text = _open()
+    book = names.get(book_name, names.get(book_name.lower()))
+    if book is None:
+        raise KeyError(book_name)
+    first, count = BOOK.unpack_from(mm, HEADER.size + book * BOOK.size)[2:]
+    if not 1 <= int(chapter) <= count:
+        raise KeyError(f"{book_name} {chapter}")
+    first, count = CHAPTER.unpack_from(mm, chapters + (first + int(chapter) - 1) * CHAPTER.size)
+    if not 1 <= int(verse) <= count:
+        raise KeyError(f"{book_name} {chapter}:{verse}")
+    slot = offsets + (first + int(verse) - 1) * OFFSET.size
+    start, end = struct.unpack_from("<2I", mm, slot)
+    if start == end:
+        raise KeyError(f"{book_name} {chapter}:{verse}")
+    return mm[text + start:text + end].decode("utf-8")
+
+
+if __name__ == "__main__":
+    build()
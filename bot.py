@@ -4,10 +4,17 @@ import random
 import re
 import datetime
 import math
-import subprocess
 import requests
 import numpy as np
-from PIL import Image, ImageDraw, ImageFont, ImageFilter
+from PIL import Image, ImageDraw, ImageFilter
+import bible_pack
+from build_alt_indexes import load_book
+import music
+import telemetry
+from particles import Particles
+from render import (FONT_SANS, FONT_SERIF, FONT_SERIF_BOLD, ENCODE_PROFILES, AnimationSink, Timeline, cache_fetch,
+                    cache_store, compose, draft_image, draw_layer, export_stills, fit_text, gradient, ink_width, key_seed, load_font,
+                    render_cached, render_draft, render_key, text_layer, text_width, wrap_words)
 
 TOKEN         = os.environ["TELEGRAM_BOT_TOKEN"]
 CHANNEL       = os.environ["TELEGRAM_CHANNEL"]
@@ -26,12 +33,11 @@ THREADS_ACCESS_TOKEN = os.environ.get("THREADS_ACCESS_TOKEN", "")
 PINTEREST_ACCESS_TOKEN = os.environ.get("PINTEREST_ACCESS_TOKEN", "")
 PINTEREST_BOARD_ID     = os.environ.get("PINTEREST_BOARD_ID", "1092404522055080754")
 
-PROGRESS_FILE = "progress.json"
-BIBLE_FILE    = "bible/lsg1910.json"
+# Reel sur Telegram : "video" (light, avec musique) ou "animation" (boucle muette sous ANIMATION_BUDGET)
+TELEGRAM_REEL_MODE = os.environ.get("TELEGRAM_REEL_MODE", "video")
 
-FONT_SERIF      = "/usr/share/fonts/truetype/dejavu/DejaVuSerif.ttf"
-FONT_SERIF_BOLD = "/usr/share/fonts/truetype/dejavu/DejaVuSerif-Bold.ttf"
-FONT_SANS       = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+PROGRESS_FILE = "progress.json"
+BIBLE_FILE    = os.environ.get("BIBLE_FILE", "")  # Bible entière en un JSON : seulement si demandé
 
 WATERMARK    = "LaBible.app"
 MINI_APP_URL = "https://t.me/BIBLE_APP_BOT/labible"
@@ -243,6 +249,13 @@ BOOK_NAME_MAP = {
 }
 
 def load_verse(book_name, chapter, verse):
+    # Corpus empaqueté (bible_pack.py) : lecture directe dans le fichier mappé, sauf
+    # si le JSON du livre a changé depuis ; sinon le seul bible/<livre>.json du verset
+    # (cache borné de load_book)
+    if not BIBLE_FILE:
+        if bible_pack.available() and bible_pack.fresh(book_name):
+            return bible_pack.verse(book_name, chapter, verse)
+        return load_book(book_name)[str(chapter)][str(verse)]
     index = get_bible_index()
     real_name = BOOK_NAME_MAP.get(book_name, book_name)
     if real_name not in index:
@@ -253,32 +266,58 @@ def load_verse(book_name, chapter, verse):
     return index[real_name][str(chapter)][str(verse)]
 
 
+def jpeg_part(path):
+    """Champ multipart (nom, octets, type) pour une couverture JPEG."""
+    with open(path, "rb") as f:
+        return os.path.basename(path), f.read(), "image/jpeg"
+
+
 # ---------------------------------------------------
 # TELEGRAM
 # ---------------------------------------------------
+@telemetry.timed
 def send_photo(path, caption):
     reply_markup = json.dumps({"inline_keyboard": [[{"text": "📖 Lire dans LaBible.app", "url": MINI_APP_URL}]]})
     with open(path, "rb") as f:
         r = requests.post(f"https://api.telegram.org/bot{TOKEN}/sendPhoto",
             data={"chat_id": CHANNEL, "caption": caption, "parse_mode": "HTML", "disable_web_page_preview": True, "reply_markup": reply_markup},
             files={"photo": f}, timeout=30)
+        telemetry.http(r)
     r.raise_for_status()
     print("✅ Telegram publié")
 
 
-def send_video(path, caption):
+@telemetry.timed
+def send_video(path, caption, cover=None):
     reply_markup = json.dumps({"inline_keyboard": [[{"text": "📖 Lire dans LaBible.app", "url": MINI_APP_URL}]]})
+    data = {"chat_id": CHANNEL, "caption": caption, "parse_mode": "HTML", "disable_web_page_preview": True, "reply_markup": reply_markup}
     with open(path, "rb") as f:
-        r = requests.post(f"https://api.telegram.org/bot{TOKEN}/sendVideo",
-            data={"chat_id": CHANNEL, "caption": caption, "parse_mode": "HTML", "disable_web_page_preview": True, "reply_markup": reply_markup},
-            files={"video": f}, timeout=60)
+        files = {"video": f}
+        if cover:
+            data["cover"], files["cover"] = "attach://cover", jpeg_part(cover)
+        r = requests.post(f"https://api.telegram.org/bot{TOKEN}/sendVideo", data=data, files=files, timeout=60)
+        telemetry.http(r)
     r.raise_for_status()
     print("✅ Telegram vidéo publié")
 
 
+@telemetry.timed
+def send_animation(path, caption):
+    """Animation MP4 muette (AnimationSink), lue en boucle : une fraction du poids de la vidéo."""
+    reply_markup = json.dumps({"inline_keyboard": [[{"text": "📖 Lire dans LaBible.app", "url": MINI_APP_URL}]]})
+    with open(path, "rb") as f:
+        r = requests.post(f"https://api.telegram.org/bot{TOKEN}/sendAnimation",
+            data={"chat_id": CHANNEL, "caption": caption, "parse_mode": "HTML", "disable_web_page_preview": True, "reply_markup": reply_markup},
+            files={"animation": f}, timeout=60)
+        telemetry.http(r)
+    r.raise_for_status()
+    print("✅ Telegram animation publiée")
+
+
 # ---------------------------------------------------
 # FACEBOOK
 # ---------------------------------------------------
+@telemetry.timed
 def post_to_facebook(image_path, ref, text, cat, cat_name):
     if not FB_PAGE_TOKEN:
         print("⚠️  FB_PAGE_TOKEN non défini.")
@@ -287,20 +326,24 @@ def post_to_facebook(image_path, ref, text, cat, cat_name):
     with open(image_path, "rb") as f:
         r = requests.post(f"https://graph.facebook.com/v25.0/{FB_PAGE_ID}/photos",
             data={"message": msg, "access_token": FB_PAGE_TOKEN}, files={"source": f}, timeout=60)
+        telemetry.http(r)
     if r.status_code == 200:
         print(f"✅ Facebook publié — {r.json().get('post_id') or r.json().get('id')}")
     else:
         print(f"❌ Erreur Facebook ({r.status_code}): {r.text}")
 
 
-def post_reel_to_facebook(video_path, ref, text, cat, cat_name):
+@telemetry.timed
+def post_reel_to_facebook(video_path, ref, text, cat, cat_name, cover=None):
     if not FB_PAGE_TOKEN:
         print("⚠️  FB_PAGE_TOKEN non défini.")
         return
     desc = f"{cat['emoji']} {ref}\n\n« {text} »\n\n📖 Bible complète gratuite sur {APP_URL}\n\n👇 Partage ce verset avec quelqu'un qui en a besoin 🙏\n\n{build_hashtags_fb(cat_name)}"
     with open(video_path, "rb") as f:
+        files = {"source": f, "thumb": jpeg_part(cover)} if cover else {"source": f}
         r = requests.post(f"https://graph.facebook.com/v25.0/{FB_PAGE_ID}/videos",
-            data={"description": desc, "access_token": FB_PAGE_TOKEN}, files={"source": f}, timeout=120)
+            data={"description": desc, "access_token": FB_PAGE_TOKEN}, files=files, timeout=120)
+        telemetry.http(r)
     if r.status_code == 200:
         print(f"✅ Facebook reel publié — {r.json().get('id')}")
     else:
@@ -310,20 +353,23 @@ def post_reel_to_facebook(video_path, ref, text, cat, cat_name):
 # ---------------------------------------------------
 # IMGBB / CLOUDINARY
 # ---------------------------------------------------
+@telemetry.timed
 def upload_to_imgbb(image_path):
     if not IMGBB_API_KEY:
         return None
     with open(image_path, "rb") as f:
         r = requests.post("https://api.imgbb.com/1/upload", params={"key": IMGBB_API_KEY}, files={"image": f}, timeout=60)
+        telemetry.http(r)
     if r.status_code == 200:
         url = r.json()["data"]["url"]
         print(f"✅ ImgBB : {url}")
-        import time; time.sleep(5)
+        telemetry.sleep(5)
         return url
     print(f"❌ ImgBB ({r.status_code}): {r.text}")
     return None
 
 
+@telemetry.timed
 def upload_to_cloudinary(image_path):
     if not CLOUDINARY_CLOUD_NAME or not CLOUDINARY_API_KEY or not CLOUDINARY_API_SECRET:
         return upload_to_imgbb(image_path)
@@ -333,15 +379,17 @@ def upload_to_cloudinary(image_path):
     with open(image_path, "rb") as f:
         r = requests.post(f"https://api.cloudinary.com/v1_1/{CLOUDINARY_CLOUD_NAME}/image/upload",
             data={"api_key": CLOUDINARY_API_KEY, "timestamp": ts, "signature": sig}, files={"file": f}, timeout=60)
+        telemetry.http(r)
     if r.status_code == 200:
         url = r.json()["secure_url"]
         print(f"✅ Cloudinary : {url}")
-        _time.sleep(3)
+        telemetry.sleep(3)
         return url
     print(f"❌ Cloudinary ({r.status_code}): {r.text}")
     return upload_to_imgbb(image_path)
 
 
+@telemetry.timed
 def upload_video_public(video_path):
     if not CLOUDINARY_CLOUD_NAME or not CLOUDINARY_API_KEY or not CLOUDINARY_API_SECRET:
         return None
@@ -353,10 +401,11 @@ def upload_video_public(video_path):
         r = requests.post(f"https://api.cloudinary.com/v1_1/{CLOUDINARY_CLOUD_NAME}/video/upload",
             data={"api_key": CLOUDINARY_API_KEY, "timestamp": ts, "signature": sig, "resource_type": "video"},
             files={"file": f}, timeout=180)
+        telemetry.http(r)
     if r.status_code == 200:
         url = r.json()["secure_url"]
         print(f"✅ Cloudinary vidéo : {url}")
-        _time.sleep(5)
+        telemetry.sleep(5)
         return url
     print(f"❌ Cloudinary vidéo ({r.status_code}): {r.text}")
     return None
@@ -365,29 +414,30 @@ def upload_video_public(video_path):
 # ---------------------------------------------------
 # INSTAGRAM
 # ---------------------------------------------------
+@telemetry.timed
 def post_to_instagram(image_path, ref, text, cat, cat_name):
     if not FB_PAGE_TOKEN:
         return
     image_url = upload_to_cloudinary(image_path)
     if not image_url:
         return
-    if "cloudinary.com" in image_url:
-        image_url = image_url.replace("/upload/", "/upload/f_jpg/")
     caption = f"{cat['emoji']} {ref}\n\n« {text} »\n\n📖 Bible complète gratuite sur {APP_URL}\n\n👇 Partage ce verset avec quelqu'un qui en a besoin 🙏\n\n{build_hashtags_ig(cat_name)}"
     r = requests.post(f"https://graph.facebook.com/v25.0/{IG_ACCOUNT_ID}/media",
         data={"image_url": image_url, "caption": caption, "access_token": FB_PAGE_TOKEN}, timeout=60)
+    telemetry.http(r)
     if r.status_code != 200:
         print(f"❌ Instagram container ({r.status_code}): {r.text}")
         return
     container_id = r.json().get("id")
     print(f"✅ Container Instagram : {container_id}")
-    import time
     for attempt in range(8):
-        time.sleep(8)
+        telemetry.sleep(8)
         rs = requests.get(f"https://graph.facebook.com/v25.0/{container_id}",
             params={"fields": "status_code", "access_token": FB_PAGE_TOKEN}, timeout=30)
+        telemetry.http(rs)
         status = rs.json().get("status_code", "")
         print(f"  ⏳ {status} (tentative {attempt+1})")
+        telemetry.record(polls=attempt+1)
         if status == "FINISHED":
             break
         if status == "ERROR":
@@ -395,33 +445,43 @@ def post_to_instagram(image_path, ref, text, cat, cat_name):
             return
     r2 = requests.post(f"https://graph.facebook.com/v25.0/{IG_ACCOUNT_ID}/media_publish",
         data={"creation_id": container_id, "access_token": FB_PAGE_TOKEN}, timeout=60)
+    telemetry.http(r2)
     if r2.status_code == 200:
         print(f"✅ Instagram publié — {r2.json().get('id')}")
     else:
         print(f"❌ Instagram publication ({r2.status_code}): {r2.text}")
 
 
-def post_reel_to_instagram(video_path, ref, text, cat, cat_name):
+@telemetry.timed
+def post_reel_to_instagram(video_path, ref, text, cat, cat_name, cover=None):
     if not FB_PAGE_TOKEN:
         return
     video_url = upload_video_public(video_path)
     if not video_url:
         return
     caption = f"{cat['emoji']} {ref}\n\n« {text} »\n\n📖 Bible complète gratuite sur {APP_URL}\n\n👇 Partage ce verset avec quelqu'un qui en a besoin 🙏\n\n{build_hashtags_ig(cat_name)}"
-    r = requests.post(f"https://graph.facebook.com/v25.0/{IG_ACCOUNT_ID}/media",
-        data={"media_type": "REELS", "video_url": video_url, "caption": caption, "access_token": FB_PAGE_TOKEN, "thumb_offset": "7500"}, timeout=60)
+    data = {"media_type": "REELS", "video_url": video_url, "caption": caption, "access_token": FB_PAGE_TOKEN}
+    # Couverture fournie : Instagram n'a pas à décoder la vidéo pour en extraire une
+    cover_url = cover and upload_to_cloudinary(cover)
+    if cover_url:
+        data["cover_url"] = cover_url
+    else:
+        data["thumb_offset"] = "7500"
+    r = requests.post(f"https://graph.facebook.com/v25.0/{IG_ACCOUNT_ID}/media", data=data, timeout=60)
+    telemetry.http(r)
     if r.status_code != 200:
         print(f"❌ Reel Instagram container ({r.status_code}): {r.text}")
         return
     container_id = r.json().get("id")
     print(f"✅ Container reel : {container_id}")
-    import time
     for attempt in range(10):
-        time.sleep(15)
+        telemetry.sleep(15)
         rs = requests.get(f"https://graph.facebook.com/v25.0/{container_id}",
             params={"fields": "status_code", "access_token": FB_PAGE_TOKEN}, timeout=30)
+        telemetry.http(rs)
         status = rs.json().get("status_code", "")
         print(f"  ⏳ {status} (tentative {attempt+1})")
+        telemetry.record(polls=attempt+1)
         if status == "FINISHED":
             break
         if status == "ERROR":
@@ -429,6 +489,7 @@ def post_reel_to_instagram(video_path, ref, text, cat, cat_name):
             return
     r2 = requests.post(f"https://graph.facebook.com/v25.0/{IG_ACCOUNT_ID}/media_publish",
         data={"creation_id": container_id, "access_token": FB_PAGE_TOKEN}, timeout=60)
+    telemetry.http(r2)
     if r2.status_code == 200:
         print(f"✅ Instagram reel publié — {r2.json().get('id')}")
     else:
@@ -438,6 +499,7 @@ def post_reel_to_instagram(video_path, ref, text, cat, cat_name):
 # ---------------------------------------------------
 # PINTEREST
 # ---------------------------------------------------
+@telemetry.timed
 def post_to_pinterest(image_path, ref, text, cat, cat_name):
     if not PINTEREST_ACCESS_TOKEN:
         return
@@ -456,6 +518,7 @@ def post_to_pinterest(image_path, ref, text, cat, cat_name):
     r = requests.post("https://api.pinterest.com/v5/pins",
         headers={"Authorization": f"Bearer {PINTEREST_ACCESS_TOKEN}", "Content-Type": "application/json"},
         json=payload, timeout=60)
+    telemetry.http(r)
     if r.status_code in (200, 201):
         print(f"✅ Pinterest publié — {r.json().get('id')}")
     else:
@@ -465,24 +528,25 @@ def post_to_pinterest(image_path, ref, text, cat, cat_name):
 # ---------------------------------------------------
 # THREADS
 # ---------------------------------------------------
+@telemetry.timed
 def post_to_threads(image_path, ref, text, cat, cat_name):
     if not THREADS_ACCESS_TOKEN:
         return
     image_url = upload_to_cloudinary(image_path)
     if not image_url:
         return
-    if "cloudinary.com" in image_url:
-        image_url = image_url.replace("/upload/", "/upload/f_jpg/")
     caption = f"{cat['emoji']} {ref}\n\n« {text} »\n\n📖 Bible complète gratuite sur {APP_URL}\n\n👇 Partage ce verset avec quelqu'un qui en a besoin 🙏\n\n{build_hashtags_ig(cat_name)}"
     r = requests.post("https://graph.threads.net/v1.0/me/threads",
         data={"media_type": "IMAGE", "image_url": image_url, "text": caption, "access_token": THREADS_ACCESS_TOKEN}, timeout=60)
+    telemetry.http(r)
     if r.status_code != 200:
         print(f"❌ Threads container ({r.status_code}): {r.text}")
         return
     container_id = r.json().get("id")
-    import time; time.sleep(5)
+    telemetry.sleep(5)
     r2 = requests.post("https://graph.threads.net/v1.0/me/threads_publish",
         data={"creation_id": container_id, "access_token": THREADS_ACCESS_TOKEN}, timeout=60)
+    telemetry.http(r2)
     if r2.status_code == 200:
         print(f"✅ Threads publié — {r2.json().get('id')}")
     else:
@@ -502,225 +566,180 @@ PALETTES = [
 ]
 
 
-def _gradient(W, H, top, bot):
-    img = Image.new("RGB", (W, H))
-    draw = ImageDraw.Draw(img)
-    for y in range(H):
-        t = y / H
-        draw.line([(0, y), (W, y)], fill=tuple(int(top[i] + t * (bot[i] - top[i])) for i in range(3)))
-    return img
-
-
 def wrap_text(draw, text, font, max_w):
-    words = text.split()
-    if not words:
-        return [""]
-    lines, current = [], words[0]
-    for w in words[1:]:
-        # Ne pas couper avant ? et ! — les garder avec le mot précédent
-        if w.startswith('?') or w.startswith('!'):
-            current = current + '\u00a0' + w
-            continue
-        test = current + " " + w
-        if draw.textlength(test, font=font) <= max_w:
-            current = test
-        else:
-            lines.append(current)
-            current = w
-    lines.append(current)
-    return lines
+    # Ne pas couper avant ? et ! — les garder avec le mot précédent
+    return wrap_words(text, font, max_w, glue=lambda w: w.startswith(('?', '!')))
 
 
-def make_image(text, ref):
-    palette = random.choice(PALETTES)
+@telemetry.timed
+def make_image(text, ref, draft=None):
+    """verse.png ; draft : chemin d'un brouillon réduit, rendu hors cache à la place."""
+    out = "verse.png"
+    key = render_key(out, text, ref)
+    if not draft and cache_fetch(key, out):
+        return out
+    palette = PALETTES[key_seed(key) % len(PALETTES)]
     bg_top, bg_bot, color_border, color_ref, color_wm = palette
     W, H = 1080, 1080
-    img = _gradient(W, H, bg_top, bg_bot)
+    img = Image.fromarray(gradient(W, H, bg_top, bg_bot))
     draw = ImageDraw.Draw(img)
     m = 60
     draw.rounded_rectangle([m, m, W-m, H-m], radius=30, outline=color_border, width=6)
     draw.rounded_rectangle([m+16, m+16, W-m-16, H-m-16], radius=24, outline=color_border, width=1)
     pad_x, top, bottom = 140, 180, 330
     max_w, max_h = W - 2*pad_x, H - top - bottom
-    chosen_font = chosen_lines = chosen_lh = None
-    for size in range(66, 34, -2):
-        font = ImageFont.truetype(FONT_SERIF, size)
-        lines = wrap_text(draw, text, font, max_w)
-        lh = int(size * 1.38)
-        if lh * len(lines) <= max_h:
-            chosen_font, chosen_lines, chosen_lh = font, lines, lh
-            break
-    if chosen_font is None:
-        chosen_font = ImageFont.truetype(FONT_SERIF, 34)
-        chosen_lines = wrap_text(draw, text, chosen_font, max_w)
-        chosen_lh = int(34 * 1.38)
+    chosen_font, chosen_lines, chosen_lh = fit_text(draw, text, FONT_SERIF, wrap_text, max_w, max_h,
+                                                    34, 66, lambda size: int(size * 1.38))
     if chosen_lines:
         chosen_lines[0] = "« " + chosen_lines[0]
         chosen_lines[-1] = chosen_lines[-1] + " »"
     y = top + max(0, (max_h - chosen_lh * len(chosen_lines)) // 2)
     for line in chosen_lines:
-        lw = draw.textlength(line, font=chosen_font)
-        x = (W - lw) // 2
+        x = (W - text_width(chosen_font, line)) // 2
         draw.text((x+2, y+2), line, font=chosen_font, fill=(0, 0, 0))
         draw.text((x, y), line, font=chosen_font, fill=(245, 245, 245))
         y += chosen_lh
     draw.line([(pad_x, H-260), (W-pad_x, H-260)], fill=color_border, width=2)
-    small = ImageFont.truetype(FONT_SANS, 36)
-    tiny = ImageFont.truetype(FONT_SANS, 28)
+    small = load_font(FONT_SANS, 36)
+    tiny = load_font(FONT_SANS, 28)
     draw.text((pad_x, H-230), ref, font=small, fill=color_ref)
     draw.text((pad_x, H-185), "LSG 1910", font=tiny, fill=color_wm)
-    ww = draw.textlength(WATERMARK, font=tiny)
-    draw.text((W-pad_x-ww, H-185), WATERMARK, font=tiny, fill=color_wm)
-    out = "verse.png"
+    draw.text((W-pad_x-text_width(tiny, WATERMARK), H-185), WATERMARK, font=tiny, fill=color_wm)
+    if draft:
+        draft_image(img).save(draft)
+        return draft
     img.save(out, "PNG")
+    cache_store(key, out)
     return out
 
 
 # ---------------------------------------------------
 # REEL
 # ---------------------------------------------------
+def pick_music(progress=None, seed=None):
+    """Piste au hasard, différente de la précédente ; avec seed, le choix est reproductible."""
+    music_files = music.tracks()
+    if not music_files:
+        return None
+    last_music = progress.get("last_music", "") if progress else ""
+    available = [m for m in music_files if m != last_music] or music_files
+    music_file = random.choice(available) if seed is None else available[seed % len(available)]
+    if progress is not None:
+        progress["last_music"] = music_file
+    return music_file
+
+
 def wrap_text_with_quotes(draw, text, font, max_w):
-    words = text.split()
-    if not words:
-        return [""]
-    q_open = draw.textlength("« ", font=font)
-    lines, current = [], words[0]
-    for w in words[1:]:
-        test = current + " " + w
-        margin = q_open if not lines else 0
-        if draw.textlength(test, font=font) + margin <= max_w:
-            current = test
-        else:
-            lines.append(current)
-            current = w
-    lines.append(current)
-    last = lines[-1]
-    if draw.textlength(last + " »", font=font) > max_w:
-        words_last = last.split()
-        new_last = words_last[0]
-        for w in words_last[1:]:
-            if draw.textlength(new_last + " " + w + " »", font=font) <= max_w:
-                new_last += " " + w
-            else:
-                lines[-1] = new_last
-                lines.append(w)
-                new_last = w
-        lines[-1] = new_last
+    lines = wrap_words(text, font, max_w, first_margin=text_width(font, "« "))
+    # Le » final doit tenir sur la dernière ligne, quitte à la recouper
+    q_close = text_width(font, " »")
+    if text_width(font, lines[-1]) + q_close > max_w:
+        lines[-1:] = wrap_words(lines[-1], font, max_w - q_close)
     if lines:
         lines[0] = "« " + lines[0]
         lines[-1] = lines[-1] + " »"
     return lines
 
 
-def make_reel_video(text, ref, progress=None):
+REEL_SECS = 15
+
+# Reels et paraboles : (fond, or, or de la référence, texte, argent)
+REEL_PALETTES = [
+    ((10, 14, 38), (180, 148, 72),  (192, 158, 80),  (230, 228, 220), (160, 160, 175)),
+    ((30,  8, 12), (210, 155, 75),  (220, 168, 85),  (255, 245, 225), (170, 145, 115)),
+    (( 8, 24, 16), (130, 190, 110), (145, 205, 125), (235, 255, 235), (110, 155, 100)),
+    ((22,  8, 40), (195, 160, 75),  (210, 175, 88),  (250, 245, 255), (155, 135, 180)),
+    ((10, 10, 10), (195, 172,  95), (210, 187, 108), (250, 248, 235), (145, 135,  95)),
+]
+
+
+@telemetry.timed
+def make_reel_video(text, ref, progress=None, sinks=(), draft=None):
+    """
+    Reel 15 s : {"master", "light"} + "cover", l'image où tout le texte est apparu,
+    en JPEG, tirée de la même passe. sinks : sorties annexes de cette passe.
+    draft : chemin d'un brouillon (.mp4 réduit ou planche contact) rendu à la place.
+    """
+    outputs = {"master": "reel.mp4", "light": "reel_light.mp4"}
+    cover = "reel_cover.jpg"
+    base = render_key(outputs["master"], text, ref)
+    seed = key_seed(base)
+    if draft:
+        return render_draft(reel_timeline(text, ref, seed), draft)
+    music_file = pick_music(progress, seed)
+    if music_file:
+        print(f"🎵 {music_file}")
+    audio = music_file and (music.clips(music_file, REEL_SECS, outputs) or music_file)
+    keys = {name: render_key(base, audio, ENCODE_PROFILES[name]) for name in outputs}
+    keys["cover"] = render_key(base, cover)
+    render_cached(lambda: reel_timeline(text, ref, seed), outputs, keys, cover,
+                  audio=audio, audio_ss=music.start(music_file), sinks=sinks)
+    print(f"✅ Reel : {', '.join(outputs.values())}, {cover}")
+    return {**outputs, "cover": cover}
+
+
+@telemetry.timed
+def reel_timeline(text, ref, seed):
+    """Mise en page du reel (calques, poussière) ; retourne la Timeline de ses images."""
     W, H = 1080, 1920
-    FPS, TOTAL = 30, 30 * 15
-    seed = abs(hash(ref)) % (2**31)
+    FPS, TOTAL = 30, 30 * REEL_SECS
     rng = np.random.default_rng(seed)
     fp, fpb = FONT_SERIF, FONT_SERIF_BOLD
     text_clean = text.rstrip('.')
     BORDER, CARD_PAD = 100, 100
     MAX_TW = W - BORDER*2 - CARD_PAD*2
-    size = 88
-    while size > 32:
-        fv = ImageFont.truetype(fp, size)
-        tmp = Image.new("RGB", (10, 10)); d = ImageDraw.Draw(tmp)
-        test_lines = wrap_text_with_quotes(d, text_clean, fv, MAX_TW)
-        lh = size + 20
-        max_line_w = max(d.textbbox((0,0), l, font=fv)[2] for l in test_lines)
-        total_h = lh * len(test_lines)
-        if max_line_w <= MAX_TW and total_h <= int((H - BORDER*2) * 0.65):
-            break
-        size -= 2
-    fv = ImageFont.truetype(fp, size)
-    tmp = Image.new("RGB", (10, 10)); d = ImageDraw.Draw(tmp)
-    verse_lines = wrap_text_with_quotes(d, text_clean, fv, MAX_TW)
-    fr = ImageFont.truetype(fpb, 36)
-    fl = ImageFont.truetype(fp, 28)
-    fw = ImageFont.truetype(fp, 28)
-    REEL_PALETTES = [
-        ((10, 14, 38), (180, 148, 72),  (192, 158, 80),  (230, 228, 220), (160, 160, 175)),
-        ((30,  8, 12), (210, 155, 75),  (220, 168, 85),  (255, 245, 225), (170, 145, 115)),
-        (( 8, 24, 16), (130, 190, 110), (145, 205, 125), (235, 255, 235), (110, 155, 100)),
-        ((22,  8, 40), (195, 160, 75),  (210, 175, 88),  (250, 245, 255), (155, 135, 180)),
-        ((10, 10, 10), (195, 172,  95), (210, 187, 108), (250, 248, 235), (145, 135,  95)),
-    ]
+    d = ImageDraw.Draw(Image.new("RGB", (10, 10)))
+    fv, verse_lines, LINE_H = fit_text(d, text_clean, fp, wrap_text_with_quotes, MAX_TW,
+                                       int((H - BORDER*2) * 0.65), 32, 88, lambda size: size + 20)
+    fr = load_font(fpb, 36)
+    fl = load_font(fp, 28)
+    fw = load_font(fp, 28)
     BG, GOLD, GR, WHITE, SIL = REEL_PALETTES[seed % len(REEL_PALETTES)]
     CX1, CY1, CX2, CY2 = BORDER, BORDER, W-BORDER, H-BORDER
-    N_P = 30
-    px = rng.uniform(CX1+20, CX2-20, N_P); py = rng.uniform(CY1+20, CY2-20, N_P)
-    ps = rng.uniform(0.2, 0.8, N_P); pr = rng.uniform(2, 5, N_P)
-    pa = rng.uniform(0, 2*math.pi, N_P)
+    dust = Particles(rng, 30, (CX1, CY1, CX2, CY2), W, H, TOTAL, GOLD, BG, FPS,
+                     speed=(0.2, 0.8), drift=20, rise=12, tint=0.6, peak=90)
     def ease(t): t = max(0, min(1, t)); return t*t*(3-2*t)
-    def blend(base, a, bg=BG):
-        a = max(0, min(1, a))
-        return tuple(int(bg[i] + (base[i]-bg[i])*a) for i in range(3))
-    LINE_H = size + 20
     start_y = int(CY1 + (CY2-CY1)*0.42 - len(verse_lines)*LINE_H//2)
     FL, FT = CY2-200, CY2-170
-    os.makedirs("frames", exist_ok=True)
-    for f in range(TOTAL):
+    lx1, lx2 = CX1+CARD_PAD, CX2-CARD_PAD
+    # Calques statiques — rendus une seule fois, seule l'opacité varie par image
+    bg = gradient(W, H, BG, shade=0.3, band=4)
+    card   = draw_layer(W, H, BG, lambda d: d.rounded_rectangle([CX1,CY1,CX2,CY2], radius=40, fill=230))
+    border = draw_layer(W, H, GOLD, lambda d: d.rounded_rectangle([CX1,CY1,CX2,CY2], radius=40, outline=255, width=5))
+    inner  = draw_layer(W, H, GOLD, lambda d: d.rounded_rectangle([CX1+10,CY1+10,CX2-10,CY2-10], radius=34, outline=255, width=1))
+    backdrop = compose(bg, [(card, 1.0), (border, 1.0), (inner, 0.3)])
+    line_layers = []
+    for i, line in enumerate(verse_lines):
+        line_layers.append(text_layer(W, H, [(((W-ink_width(fv, line))//2, start_y + i*LINE_H), line, fv)], WHITE, shadow=0.6))
+    foot_line = draw_layer(W, H, GOLD, lambda d: d.line([(lx1, FL), (lx2, FL)], fill=255, width=2))
+    foot_ref  = text_layer(W, H, [((lx1, FT), ref, fr)], GR)
+    foot_wm   = text_layer(W, H, [((lx1, FT+44), "LSG 1910", fl), ((lx2-ink_width(fw, WATERMARK), FT+44), WATERMARK, fw)], SIL)
+    frame = np.empty_like(bg)  # tampon unique, réécrit à chaque image
+
+    def render_frame(f):
         s = f / FPS
         alpha = ease(s/0.5) if s < 0.5 else (ease((15-s)/1.5) if s > 13.5 else 1.0)
-        img = Image.new("RGB", (W, H), BG)
-        draw = ImageDraw.Draw(img)
-        for y in range(0, H, 4):
-            t2 = y/H
-            draw.rectangle([(0, y), (W, min(y+4, H))], fill=tuple(max(0, int(BG[i]*(1-t2*0.3))) for i in range(3)))
-        cl = Image.new("RGBA", (W, H), (0, 0, 0, 0))
-        cd = ImageDraw.Draw(cl)
-        cd.rounded_rectangle([CX1,CY1,CX2,CY2], radius=40, fill=(*BG, int(alpha*230)))
-        img = Image.alpha_composite(img.convert("RGBA"), cl).convert("RGB")
-        draw = ImageDraw.Draw(img)
-        draw.rounded_rectangle([CX1,CY1,CX2,CY2], radius=40, outline=blend(GOLD, alpha), width=5)
-        draw.rounded_rectangle([CX1+10,CY1+10,CX2-10,CY2-10], radius=34, outline=blend(GOLD, alpha*0.3), width=1)
-        pl = Image.new("RGBA", (W, H), (0, 0, 0, 0))
-        pd = ImageDraw.Draw(pl)
-        for i in range(N_P):
-            tp = s * ps[i]
-            cx = int((px[i] + math.sin(tp*0.5+pa[i])*20) % W)
-            cy = int((py[i] - s*ps[i]*12) % H)
-            bright = (math.sin(tp+pa[i])+1)/2*0.3+0.1
-            a_p = int(bright*alpha*90)
-            pd.ellipse([(cx-int(pr[i]), cy-int(pr[i])), (cx+int(pr[i]), cy+int(pr[i]))], fill=(*blend(GOLD, bright*0.6), a_p))
-        img = Image.alpha_composite(img.convert("RGBA"), pl).convert("RGB")
-        draw = ImageDraw.Draw(img)
-        for i, line in enumerate(verse_lines):
+        if alpha >= 1:
+            np.copyto(frame, backdrop)
+        else:
+            np.copyto(frame, bg)
+            for layer, a in [(card, alpha), (border, alpha), (inner, alpha*0.3)]:
+                layer.blend(frame, a)
+        dust.draw(frame, f, alpha)
+        for i, layer in enumerate(line_layers):
             ls = 0.1 + i*0.20; le = ls + 0.5
             la = (0 if s<ls else (ease((s-ls)/(le-ls)) if s<le else 1.0)) * alpha
-            bbox = draw.textbbox((0,0), line, font=fv); tw = bbox[2]-bbox[0]
-            x = (W-tw)//2; y = start_y + i*LINE_H
-            draw.text((x+2, y+2), line, font=fv, fill=blend((0,0,0), la*0.6))
-            draw.text((x, y), line, font=fv, fill=blend(WHITE, la))
+            layer.blend(frame, la)
         fs = 0.6 + len(verse_lines)*0.20 + 0.3
         fa = (0 if s<fs else (ease((s-fs)/0.6) if s<fs+0.6 else 1.0)) * alpha
-        lx1, lx2 = CX1+CARD_PAD, CX2-CARD_PAD
-        draw.line([(lx1, FL), (lx2, FL)], fill=blend(GOLD, fa*0.8), width=2)
-        draw.text((lx1, FT), ref, font=fr, fill=blend(GR, fa))
-        draw.text((lx1, FT+44), "LSG 1910", font=fl, fill=blend(SIL, fa*0.85))
-        wbbox = draw.textbbox((0,0), WATERMARK, font=fw)
-        draw.text((lx2-(wbbox[2]-wbbox[0]), FT+44), WATERMARK, font=fw, fill=blend(SIL, fa*0.85))
-        img.save(f"frames/frame_{f:04d}.png")
-    output_path = "reel.mp4"
-    import glob, shutil
-    music_files = glob.glob("music/*.mp3") + glob.glob("music/*.m4a") + glob.glob("music/*.ogg")
-    music_file = None
-    if music_files:
-        last_music = progress.get("last_music", "") if progress else ""
-        available = [m for m in music_files if m != last_music] or music_files
-        music_file = random.choice(available)
-        if progress is not None:
-            progress["last_music"] = music_file
-    if music_file:
-        print(f"🎵 {music_file}")
-        subprocess.run(['ffmpeg', '-framerate', '30', '-i', 'frames/frame_%04d.png', '-ss', '2', '-i', music_file,
-            '-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-crf', '20', '-c:a', 'aac', '-b:a', '192k', '-shortest', output_path, '-y'], capture_output=True)
-    else:
-        subprocess.run(['ffmpeg', '-framerate', '30', '-i', 'frames/frame_%04d.png',
-            '-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-crf', '20', output_path, '-y'], capture_output=True)
-    shutil.rmtree("frames", ignore_errors=True)
-    print(f"✅ Reel : {output_path}")
-    return output_path
+        foot_line.blend(frame, fa*0.8)
+        foot_ref.blend(frame, fa)
+        foot_wm.blend(frame, fa*0.85)
+        return frame
+
+    # Couverture : première image où le pied de carte a fini d'apparaître
+    hero = math.ceil((0.6 + len(verse_lines)*0.20 + 0.3 + 0.6) * FPS)
+    return Timeline(render_frame, TOTAL, W, H, FPS, hero)
 
 
 # ---------------------------------------------------
@@ -750,8 +769,10 @@ def pick_from_category(cat, progress):
     return book, ch, v
 
 
-def pick_verse(progress):
-    hour_utc = datetime.datetime.utcnow().hour
+@telemetry.timed
+def pick_verse(progress, hour_utc=None):
+    if hour_utc is None:
+        hour_utc = datetime.datetime.utcnow().hour
     cat_name = HOUR_SCHEDULE.get(hour_utc)
     if cat_name is None:
         cat_name = HOUR_FALLBACK.get(hour_utc, "promise")
@@ -765,6 +786,7 @@ def pick_verse(progress):
         if not is_rubric(raw_text):
             break
         print(f"⏭️  Rubrique ignorée : {book} {ch}:{v}")
+        telemetry.count("rubrics_skipped")
     raw_text = strip_rubric(raw_text)
     text = clean_text(raw_text)
     display_book = "Psaumes" if book == "Psaume" else book
@@ -775,7 +797,20 @@ def pick_verse(progress):
 # ---------------------------------------------------
 # YOUTUBE
 # ---------------------------------------------------
-def post_to_youtube(video_path, ref, text, cat, cat_name, hour_utc):
+@telemetry.timed
+def set_youtube_thumbnail(youtube, video_id, cover):
+    """Miniature personnalisée ; refusée si la chaîne n'est pas vérifiée, sans bloquer la publication."""
+    from googleapiclient.http import MediaFileUpload
+    try:
+        youtube.thumbnails().set(videoId=video_id, media_body=MediaFileUpload(cover, mimetype="image/jpeg")).execute()
+        telemetry.record(bytes_sent=os.path.getsize(cover))
+        print("✅ Miniature YouTube")
+    except Exception as e:
+        print(f"⚠️  Miniature YouTube : {e}")
+
+
+@telemetry.timed
+def post_to_youtube(video_path, ref, text, cat, cat_name, hour_utc, cover=None):
     if not YT_CLIENT_ID or not YT_CLIENT_SECRET or not YT_REFRESH_TOKEN:
         print("⚠️  Credentials YouTube manquants.")
         return
@@ -798,12 +833,16 @@ def post_to_youtube(video_path, ref, text, cat, cat_name, hour_utc):
             "status": {"privacyStatus": "public", "selfDeclaredMadeForKids": False}}
         media = MediaFileUpload(video_path, mimetype="video/mp4", resumable=True)
         request = youtube.videos().insert(part="snippet,status", body=body, media_body=media)
+        telemetry.record(bytes_sent=os.path.getsize(video_path))
         response = None
         while response is None:
             status, response = request.next_chunk()
+            telemetry.count("chunks")
             if status:
                 print(f"  ⏳ YouTube : {int(status.progress()*100)}%")
         print(f"✅ YouTube Short — https://youtube.com/shorts/{response.get('id')}")
+        if cover:
+            set_youtube_thumbnail(youtube, response.get("id"), cover)
     except Exception as e:
         print(f"❌ YouTube : {e}")
 
@@ -811,16 +850,62 @@ def post_to_youtube(video_path, ref, text, cat, cat_name, hour_utc):
 # ---------------------------------------------------
 # PARABOLE VIDEO — vídeo longo 60-90s avec texte complet
 # ---------------------------------------------------
-def make_parabole_video(title, verses, progress=None):
+SECS_PER_VERSE = 6  # secondes par verset
+SECS_TITLE = 4      # secondes pour le titre
+SECS_FINAL = 4      # secondes pour le final
+PARABOLE_FPS = 30
+
+
+def parabole_segments(title, verses, seed):
+    """
+    [(images, clé), ...] des segments de parabole_timeline : titre, un par verset, final.
+    Chaque segment ne dépend que de son contenu et de la palette (tirée du titre) : un
+    verset corrigé ne réencode que son segment ; le final, commun à toutes les paraboles
+    d'une même palette, et une parabole qui revient ne sont encodés qu'une fois.
+    """
+    palette = REEL_PALETTES[seed % len(REEL_PALETTES)]
+    return ([(SECS_TITLE*PARABOLE_FPS, render_key("parabole_title", palette, title))]
+            + [(SECS_PER_VERSE*PARABOLE_FPS, render_key("parabole_verse", palette, idx, len(verses), ref_v, text_v))
+               for idx, (ref_v, text_v) in enumerate(verses)]
+            + [(SECS_FINAL*PARABOLE_FPS, render_key("parabole_final", palette))])
+
+
+@telemetry.timed
+def make_parabole_video(title, verses, progress=None, sinks=(), draft=None):
     """
     verses = liste de tuples (ref, text)
     ex: [("Luc 15:11", "Un homme avait deux fils."), ("Luc 15:12", "...")]
+    Retourne {"master", "light", "cover"} ; la couverture est le carton titre.
+    sinks : sorties annexes alimentées par la même passe que l'encodage.
+    draft : chemin d'un brouillon (.mp4 réduit ou planche contact) rendu à la place.
     """
+    outputs = {"master": "parabole.mp4", "light": "parabole_light.mp4"}
+    cover = "parabole_cover.jpg"
+    base = render_key(outputs["master"], title, verses)
+    # Palette (et musique) tirées du titre seul : corriger un verset ne change ni la
+    # palette ni les clés des autres segments, qui restent en cache
+    seed = key_seed(render_key("parabole", title))
+    if draft:
+        return render_draft(parabole_timeline(title, verses, seed), draft)
+    music_file = pick_music(progress, seed)
+    if music_file:
+        print(f"🎵 {music_file}")
+    secs = SECS_TITLE + len(verses) * SECS_PER_VERSE + SECS_FINAL
+    audio = music_file and (music.clips(music_file, secs, outputs) or music_file)
+    keys = {name: render_key(base, audio, ENCODE_PROFILES[name]) for name in outputs}
+    keys["cover"] = render_key(base, cover)
+    render_cached(lambda: parabole_timeline(title, verses, seed), outputs, keys, cover,
+                  audio=audio, audio_ss=music.start(music_file), sinks=sinks,
+                  segments=parabole_segments(title, verses, seed))
+    print(f"✅ Parabole vidéo : {', '.join(outputs.values())}, {cover}")
+    return {**outputs, "cover": cover}
+
+
+@telemetry.timed
+def parabole_timeline(title, verses, seed):
+    """Timeline précompilée de la parabole : titre, un segment par verset, final."""
     W, H = 1080, 1920
-    FPS = 30
-    SECS_PER_VERSE = 6  # secondes par verset
-    SECS_TITLE = 4      # secondes pour le titre
-    SECS_FINAL = 4      # secondes pour le final
+    FPS = PARABOLE_FPS
     TOTAL = FPS * (SECS_TITLE + len(verses) * SECS_PER_VERSE + SECS_FINAL)
 
     fp  = FONT_SERIF
@@ -828,14 +913,6 @@ def make_parabole_video(title, verses, progress=None):
     BORDER, CARD_PAD = 100, 100
     MAX_TW = W - BORDER*2 - CARD_PAD*2
 
-    REEL_PALETTES = [
-        ((10, 14, 38),  (180, 148, 72),  (192, 158, 80),  (230, 228, 220), (160, 160, 175)),
-        ((30,  8, 12),  (210, 155, 75),  (220, 168, 85),  (255, 245, 225), (170, 145, 115)),
-        (( 8, 24, 16),  (130, 190, 110), (145, 205, 125), (235, 255, 235), (110, 155, 100)),
-        ((22,  8, 40),  (195, 160, 75),  (210, 175, 88),  (250, 245, 255), (155, 135, 180)),
-        ((10, 10, 10),  (195, 172,  95), (210, 187, 108), (250, 248, 235), (145, 135,  95)),
-    ]
-    seed = abs(hash(title)) % (2**31)
     BG, GOLD, GR, WHITE, SIL = REEL_PALETTES[seed % len(REEL_PALETTES)]
 
     def ease(t): t = max(0, min(1, t)); return t*t*(3-2*t)
@@ -843,157 +920,82 @@ def make_parabole_video(title, verses, progress=None):
         a = max(0, min(1, a))
         return tuple(int(bg[i] + (base[i]-bg[i])*a) for i in range(3))
 
-    def draw_bg(draw):
-        for y in range(0, H, 4):
-            t2 = y/H
-            draw.rectangle([(0, y), (W, min(y+4, H))],
-                fill=tuple(max(0, int(BG[i]*(1-t2*0.25))) for i in range(3)))
-
     def wrap(draw, text, font, max_w):
-        words = text.split()
-        if not words: return [""]
-        lines, current = [], words[0]
-        for w in words[1:]:
-            if w.startswith('?') or w.startswith('!') or w == '»':
-                current += '\u00a0' + w
-                continue
-            test = current + " " + w
-            if draw.textlength(test, font=font) <= max_w:
-                current = test
-            else:
-                lines.append(current)
-                current = w
-        lines.append(current)
+        lines = wrap_words(text, font, max_w, glue=lambda w: w.startswith(('?', '!')) or w == '»')
         # S'assurer que » est collé à la dernière ligne et non seul
         if len(lines) > 1 and lines[-1].strip() == '»':
             lines[-2] = lines[-2] + '\u00a0»'
             lines.pop()
         return lines
 
-    def autosize_font(draw, text, max_w, max_h):
-        for size in range(88, 32, -2):
-            fv = ImageFont.truetype(fp, size)
-            lines = wrap(draw, text, fv, max_w)
-            lh = size + 20
-            max_line_w = max(draw.textbbox((0,0), l, font=fv)[2] for l in lines)
-            if max_line_w <= max_w and lh * len(lines) <= max_h:
-                return fv, lines, lh
-        fv = ImageFont.truetype(fp, 32)
-        lines = wrap(draw, text, fv, max_w)
-        return fv, lines, 52
-
-    f_title_big = ImageFont.truetype(fpb, 96)
-    f_sub       = ImageFont.truetype(fp,  36)
-    f_ref       = ImageFont.truetype(fpb, 36)
-    f_wm        = ImageFont.truetype(FONT_SANS, 28)
+    f_title_big = load_font(fpb, 96)
+    f_sub       = load_font(fp,  36)
+    f_ref       = load_font(fpb, 36)
+    f_wm        = load_font(FONT_SANS, 28)
     max_text_h  = int((H - BORDER*2) * 0.65)
 
-    os.makedirs("frames", exist_ok=True)
-
-    for f in range(TOTAL):
-        s = f / FPS
-        img = Image.new("RGB", (W, H), BG)
-        draw = ImageDraw.Draw(img)
-        draw_bg(draw)
-
-        draw.rounded_rectangle([BORDER, BORDER, W-BORDER, H-BORDER], radius=40, outline=blend(GOLD, 0.8), width=5)
-        draw.rounded_rectangle([BORDER+10, BORDER+10, W-BORDER-10, H-BORDER-10], radius=34, outline=blend(GOLD, 0.25), width=1)
-
-        title_end = SECS_TITLE
-
-        if s < title_end:
-            a = ease(s/0.8) if s < 0.8 else (ease((title_end-s)/0.5) if s > title_end-0.5 else 1.0)
-            lines = wrap(draw, title, f_title_big, MAX_TW)
-            lh = 110
-            ty = H//2 - (len(lines)*lh)//2 - 60
-            for line in lines:
-                bbox = draw.textbbox((0,0), line, font=f_title_big)
-                tw = bbox[2]-bbox[0]
-                x = (W-tw)//2
-                draw.text((x+2, ty+2), line, font=f_title_big, fill=blend((0,0,0), a*0.5))
-                draw.text((x, ty), line, font=f_title_big, fill=blend(GOLD, a))
-                ty += lh
-            sub = "Les Paraboles de Jésus · LSG 1910"
-            bbox2 = draw.textbbox((0,0), sub, font=f_sub)
-            sw = bbox2[2]-bbox2[0]
-            draw.line([((W-300)//2, H//2+90), ((W+300)//2, H//2+90)], fill=blend(GOLD, a*0.5), width=1)
-            draw.text(((W-sw)//2, H//2+105), sub, font=f_sub, fill=blend(SIL, a*0.7))
-
-        elif s < title_end + len(verses) * SECS_PER_VERSE:
-            verse_s = s - title_end
-            verse_idx = int(verse_s / SECS_PER_VERSE)
-            verse_idx = min(verse_idx, len(verses)-1)
-            local_s = verse_s - verse_idx * SECS_PER_VERSE
-            a = ease(local_s/0.5) if local_s < 0.5 else (ease((SECS_PER_VERSE-local_s)/0.5) if local_s > SECS_PER_VERSE-0.5 else 1.0)
-
-            ref_v, text_v = verses[verse_idx]
-            num = f"{verse_idx+1}/{len(verses)}"
-            draw.text((BORDER+CARD_PAD, BORDER+50), num, font=f_wm, fill=blend(SIL, a*0.5))
-
-            text_q = f"« {text_v.rstrip('.')} »"
-            fv, lines, lh = autosize_font(draw, text_q, MAX_TW, max_text_h)
-            total_h = lh * len(lines)
-            ty = BORDER + (H - BORDER*2)//2 - total_h//2 - 40
-
-            for line in lines:
-                bbox = draw.textbbox((0,0), line, font=fv)
-                tw = bbox[2]-bbox[0]
-                x = (W-tw)//2
-                draw.text((x+2, ty+2), line, font=fv, fill=blend((0,0,0), a*0.6))
-                draw.text((x, ty), line, font=fv, fill=blend(WHITE, a))
-                ty += lh
-
-            lx1, lx2 = BORDER+CARD_PAD, W-BORDER-CARD_PAD
-            draw.line([(lx1, H-250), (lx2, H-250)], fill=blend(GOLD, a*0.8), width=2)
-            draw.text((lx1, H-230), ref_v, font=f_ref, fill=blend(GR, a))
-            draw.text((lx1, H-185), "LSG 1910", font=f_wm, fill=blend(SIL, a*0.85))
-            wbbox = draw.textbbox((0,0), WATERMARK, font=f_wm)
-            draw.text((lx2-(wbbox[2]-wbbox[0]), H-185), WATERMARK, font=f_wm, fill=blend(SIL, a*0.85))
-
-        else:
-            final_s = s - title_end - len(verses)*SECS_PER_VERSE
-            a = ease(final_s/0.8) if final_s < 0.8 else 1.0
-            msg = "Lisez la Bible complète"
-            bbox3 = draw.textbbox((0,0), msg, font=f_sub)
-            tw3 = bbox3[2]-bbox3[0]
-            draw.text(((W-tw3)//2, H//2-100), msg, font=f_sub, fill=blend(SIL, a*0.8))
-            app = "LaBible.app"
-            bbox4 = draw.textbbox((0,0), app, font=f_title_big)
-            tw4 = bbox4[2]-bbox4[0]
-            draw.text(((W-tw4)//2+2, H//2+2), app, font=f_title_big, fill=blend((0,0,0), a*0.5))
-            draw.text(((W-tw4)//2, H//2), app, font=f_title_big, fill=blend(GOLD, a))
-            sub2 = "Gratuit · Sans publicité · LSG 1910"
-            bbox5 = draw.textbbox((0,0), sub2, font=f_wm)
-            sw2 = bbox5[2]-bbox5[0]
-            draw.text(((W-sw2)//2, H//2+120), sub2, font=f_wm, fill=blend(SIL, a*0.6))
-
-        img.save(f"frames/frame_{f:04d}.png")
-
-    output_path = "parabole.mp4"
-    import glob, shutil
-    music_files = glob.glob("music/*.mp3") + glob.glob("music/*.m4a") + glob.glob("music/*.ogg")
-    music_file = None
-    if music_files:
-        last_music = progress.get("last_music", "") if progress else ""
-        available = [m for m in music_files if m != last_music] or music_files
-        music_file = random.choice(available)
-        if progress is not None:
-            progress["last_music"] = music_file
-    if music_file:
-        print(f"🎵 {music_file}")
-        subprocess.run(['ffmpeg', '-framerate', '30', '-i', 'frames/frame_%04d.png',
-            '-ss', '2', '-i', music_file,
-            '-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-crf', '20',
-            '-c:a', 'aac', '-b:a', '192k', '-shortest', output_path, '-y'], capture_output=True)
-    else:
-        subprocess.run(['ffmpeg', '-framerate', '30', '-i', 'frames/frame_%04d.png',
-            '-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-crf', '20',
-            output_path, '-y'], capture_output=True)
-    shutil.rmtree("frames", ignore_errors=True)
-    print(f"✅ Parabole vidéo : {output_path}")
-    return output_path
-
-
+    # Fond + cadre : identiques sur toute la vidéo, rendus une seule fois
+    backdrop_img = Image.fromarray(gradient(W, H, BG, shade=0.25, band=4))
+    draw = ImageDraw.Draw(backdrop_img)
+    draw.rounded_rectangle([BORDER, BORDER, W-BORDER, H-BORDER], radius=40, outline=blend(GOLD, 0.8), width=5)
+    draw.rounded_rectangle([BORDER+10, BORDER+10, W-BORDER-10, H-BORDER-10], radius=34, outline=blend(GOLD, 0.25), width=1)
+    backdrop = np.array(backdrop_img)
+
+    def centered(text, font, y):
+        return (((W-ink_width(font, text))//2, y), text, font)
+
+    # Timeline précompilée : (début, fin, fondu(local_s), [(calque, opacité relative)])
+    # Polices, retours à la ligne et positions sont résolus une seule fois par segment.
+    segments = []
+
+    lines = wrap(draw, title, f_title_big, MAX_TW)
+    ty = H//2 - (len(lines)*110)//2 - 60
+    sub = "Les Paraboles de Jésus · LSG 1910"
+    segments.append((0, SECS_TITLE,
+        lambda ls: ease(ls/0.8) if ls < 0.8 else (ease((SECS_TITLE-ls)/0.5) if ls > SECS_TITLE-0.5 else 1.0),
+        [(text_layer(W, H, [centered(l, f_title_big, ty + i*110) for i, l in enumerate(lines)], GOLD, shadow=0.5), 1.0),
+         (draw_layer(W, H, GOLD, lambda d: d.line([((W-300)//2, H//2+90), ((W+300)//2, H//2+90)], fill=255, width=1)), 0.5),
+         (text_layer(W, H, [centered(sub, f_sub, H//2+105)], SIL), 0.7)]))
+
+    lx1, lx2 = BORDER+CARD_PAD, W-BORDER-CARD_PAD
+    foot_line = draw_layer(W, H, GOLD, lambda d: d.line([(lx1, H-250), (lx2, H-250)], fill=255, width=2))
+    foot_wm   = text_layer(W, H, [((lx1, H-185), "LSG 1910", f_wm), ((lx2-ink_width(f_wm, WATERMARK), H-185), WATERMARK, f_wm)], SIL)
+    for idx, (ref_v, text_v) in enumerate(verses):
+        start = SECS_TITLE + idx*SECS_PER_VERSE
+        fv, lines, lh = fit_text(draw, f"« {text_v.rstrip('.')} »", fp, wrap, MAX_TW, max_text_h,
+                                 32, 88, lambda size: size + 20)
+        ty = BORDER + (H - BORDER*2)//2 - lh*len(lines)//2 - 40
+        segments.append((start, start + SECS_PER_VERSE,
+            lambda ls: ease(ls/0.5) if ls < 0.5 else (ease((SECS_PER_VERSE-ls)/0.5) if ls > SECS_PER_VERSE-0.5 else 1.0),
+            [(text_layer(W, H, [((BORDER+CARD_PAD, BORDER+50), f"{idx+1}/{len(verses)}", f_wm)], SIL), 0.5),
+             (text_layer(W, H, [centered(l, fv, ty + i*lh) for i, l in enumerate(lines)], WHITE, shadow=0.6), 1.0),
+             (foot_line, 0.8),
+             (text_layer(W, H, [((lx1, H-230), ref_v, f_ref)], GR), 1.0),
+             (foot_wm, 0.85)]))
+
+    start = SECS_TITLE + len(verses)*SECS_PER_VERSE
+    segments.append((start, start + SECS_FINAL,
+        lambda ls: ease(ls/0.8) if ls < 0.8 else 1.0,
+        [(text_layer(W, H, [centered("Lisez la Bible complète", f_sub, H//2-100)], SIL), 0.8),
+         (text_layer(W, H, [centered("LaBible.app", f_title_big, H//2)], GOLD, shadow=0.5), 1.0),
+         (text_layer(W, H, [centered("Gratuit · Sans publicité · LSG 1910", f_wm, H//2+120)], SIL), 0.6)]))
+
+    seg_of_frame = np.repeat(np.arange(len(segments)), [(e - b)*FPS for b, e, _, _ in segments])
+    frame = np.empty_like(backdrop)  # tampon unique, réécrit à chaque image
+
+    def render_frame(f):
+        start, _, fade, layers = segments[seg_of_frame[f]]
+        a = fade(f/FPS - start)
+        np.copyto(frame, backdrop)
+        for layer, k in layers:
+            layer.blend(frame, a*k)
+        return frame
+
+    # Couverture : le carton titre, fondu d'entrée terminé
+    return Timeline(render_frame, TOTAL, W, H, FPS, hero=FPS)
+
+
+@telemetry.timed
 def pick_parabole(progress):
     """Charge la prochaine parabole depuis paraboles_curated.json"""
     paraboles_file = "paraboles_curated.json"
@@ -1006,24 +1008,32 @@ def pick_parabole(progress):
     return parabole
 
 
-def main_parabole():
-    progress = load_json(PROGRESS_FILE)
+@telemetry.timed
+def prepare_parabole(progress, hour_utc=None):
     parabole = pick_parabole(progress)
     title = parabole["title"]
     verses = [(v["ref"], v["text"]) for v in parabole["verses"]]
     print(f"📖 Parabole — {title} ({len(verses)} versets)")
-
-    video = make_parabole_video(title, verses, progress)
-
+    videos = make_parabole_video(title, verses, progress)
     # Caption court pour Telegram/Instagram
     first_ref = verses[0][0] if verses else ""
     caption = f"✝️ <b>{title}</b>\n{first_ref}\n#LaBible #LSG1910 #ParaboleDeJésus"
-    send_video(video, caption)
+    return {"mode": "parabole", "parabole": parabole, "caption": caption,
+            "files": {"video": videos["master"], "video_light": videos["light"], "cover": videos["cover"]}}
+
+
+@telemetry.timed
+def publish_parabole(item):
+    parabole, video, light = item["parabole"], item["files"]["video"], item["files"]["video_light"]
+    cover = item["files"].get("cover")
+    title = parabole["title"]
+    verses = [(v["ref"], v["text"]) for v in parabole["verses"]]
+    send_video(light, item["caption"], cover)
 
     # Publier sur les plateformes
     cat = CATEGORIES["jesus"]
-    post_reel_to_facebook(video, title, verses[0][1] if verses else "", cat, "jesus")
-    post_reel_to_instagram(video, title, verses[0][1] if verses else "", cat, "jesus")
+    post_reel_to_facebook(video, title, verses[0][1] if verses else "", cat, "jesus", cover)
+    post_reel_to_instagram(light, title, verses[0][1] if verses else "", cat, "jesus", cover)
 
     # YouTube — titre avec référence
     try:
@@ -1045,58 +1055,239 @@ def main_parabole():
                 "status": {"privacyStatus": "public", "selfDeclaredMadeForKids": False}}
             media = MediaFileUpload(video, mimetype="video/mp4", resumable=True)
             request = youtube.videos().insert(part="snippet,status", body=body, media_body=media)
+            telemetry.record(bytes_sent=os.path.getsize(video))
             response = None
             while response is None:
                 status, response = request.next_chunk()
+                telemetry.count("chunks")
                 if status:
                     print(f"  ⏳ YouTube : {int(status.progress()*100)}%")
             print(f"✅ YouTube publié — https://youtube.com/watch?v={response.get('id')}")
+            if cover:
+                set_youtube_thumbnail(youtube, response.get("id"), cover)
     except Exception as e:
         print(f"❌ YouTube parabole : {e}")
 
-    save_json(PROGRESS_FILE, progress)
-    print("✅ Terminé (parabole).")
-
 
 # ---------------------------------------------------
-# MAIN
+# IMAGE & REEL — sélection + rendu, puis publication
 # ---------------------------------------------------
-def main():
-    progress = load_json(PROGRESS_FILE)
-    text, ref, cat, cat_name, hour_utc = pick_verse(progress)
+@telemetry.timed
+def prepare_image(progress, hour_utc=None):
+    text, ref, cat, cat_name, hour_utc = pick_verse(progress, hour_utc)
     print(f"📖 Image — {ref} [{cat_name}]")
-    img = make_image(text, ref)
+    stills = export_stills(make_image(text, ref))
     caption = f"{cat['emoji']} <b>{ref}</b>\n#LaBible #LSG1910 #versetdujour {cat['tag']}"
-    send_photo(img, caption)
-    post_to_facebook(img, ref, text, cat, cat_name)
-    post_to_instagram(img, ref, text, cat, cat_name)
-    post_to_pinterest(img, ref, text, cat, cat_name)
-    post_to_threads(img, ref, text, cat, cat_name)
-    save_json(PROGRESS_FILE, progress)
-    print("✅ Terminé (image).")
+    return {"mode": "image", "text": text, "ref": ref, "cat_name": cat_name, "hour_utc": hour_utc,
+            "caption": caption, "files": stills}
 
 
-def main_reel():
-    progress = load_json(PROGRESS_FILE)
-    text, ref, cat, cat_name, hour_utc = pick_verse(progress)
+@telemetry.timed
+def publish_image(item):
+    files, text, ref, cat_name = item["files"], item["text"], item["ref"], item["cat_name"]
+    cat = CATEGORIES[cat_name]
+    send_photo(files["telegram"], item["caption"])
+    post_to_facebook(files["facebook"], ref, text, cat, cat_name)
+    post_to_instagram(files["instagram"], ref, text, cat, cat_name)
+    post_to_pinterest(files["pinterest"], ref, text, cat, cat_name)
+    post_to_threads(files["threads"], ref, text, cat, cat_name)
+
+
+@telemetry.timed
+def prepare_reel(progress, hour_utc=None):
+    text, ref, cat, cat_name, hour_utc = pick_verse(progress, hour_utc)
     print(f"🎬 Reel — {ref} [{cat_name}]")
     if not os.path.exists("logo.png"):
         try:
             r = requests.get("https://labible.app/icons/icon-512x512.png", timeout=10)
+            telemetry.http(r)
             if r.status_code == 200:
                 with open("logo.png", "wb") as f:
                     f.write(r.content)
         except Exception as e:
             print(f"⚠️ Logo : {e}")
-    video = make_reel_video(text, ref, progress)
+    # L'animation Telegram sort de la même passe que la vidéo
+    teaser = "reel_animation.mp4" if TELEGRAM_REEL_MODE == "animation" else None
+    videos = make_reel_video(text, ref, progress, sinks=[AnimationSink(teaser)] if teaser else ())
     caption = f"{cat['emoji']} <b>{ref}</b>\n#LaBible #LSG1910 #versetdujour {cat['tag']}"
-    send_video(video, caption)
-    post_reel_to_facebook(video, ref, text, cat, cat_name)
-    post_reel_to_instagram(video, ref, text, cat, cat_name)
-    post_to_youtube(video, ref, text, cat, cat_name, hour_utc)
-    post_to_threads(make_image(text, ref), ref, text, cat, cat_name)
-    save_json(PROGRESS_FILE, progress)
-    print("✅ Terminé (reel).")
+    files = {"video": videos["master"], "video_light": videos["light"], "cover": videos["cover"],
+             **export_stills(make_image(text, ref), ["threads"])}
+    if teaser and os.path.exists(teaser):  # absente si hors budget : la vidéo light est publiée
+        files["animation"] = teaser
+    return {"mode": "reel", "text": text, "ref": ref, "cat_name": cat_name, "hour_utc": hour_utc, "caption": caption,
+            "files": files}
+
+
+@telemetry.timed
+def publish_reel(item):
+    video, light, cover = item["files"]["video"], item["files"]["video_light"], item["files"].get("cover")
+    text, ref, cat_name = item["text"], item["ref"], item["cat_name"]
+    cat = CATEGORIES[cat_name]
+    if item["files"].get("animation"):
+        send_animation(item["files"]["animation"], item["caption"])
+    else:
+        send_video(light, item["caption"], cover)
+    post_reel_to_facebook(video, ref, text, cat, cat_name, cover)
+    post_reel_to_instagram(light, ref, text, cat, cat_name, cover)
+    post_to_youtube(video, ref, text, cat, cat_name, item["hour_utc"], cover)
+    post_to_threads(item["files"]["threads"], ref, text, cat, cat_name)
+
+
+# ---------------------------------------------------
+# PRÉ-RENDU — file d'attente ready/ remplie à l'avance, vidée par les créneaux
+# ---------------------------------------------------
+READY_DIR      = "ready"
+READY_MANIFEST = os.path.join(READY_DIR, "manifest.json")
+SLOT_FORMAT    = "%Y-%m-%dT%H"
+
+# Créneau UTC → mode, aligné avec publish.yml
+SLOT_MODES = {5: "image", 6: "reel", 10: "parabole", 11: "image", 13: "reel", 17: "image", 19: "reel"}
+PREPARE = {"image": prepare_image, "reel": prepare_reel, "parabole": prepare_parabole}
+PUBLISH = {"image": publish_image, "reel": publish_reel, "parabole": publish_parabole}
+
+
+def slot_key(t):
+    return t.strftime(SLOT_FORMAT)
+
+
+def next_slots(n, now=None):
+    """Les n prochains créneaux de publication : [(datetime UTC à l'heure pile, mode), ...]."""
+    t = (now or datetime.datetime.utcnow()).replace(minute=0, second=0, microsecond=0)
+    slots = []
+    while len(slots) < n:
+        t += datetime.timedelta(hours=1)
+        if t.hour in SLOT_MODES:
+            slots.append((t, SLOT_MODES[t.hour]))
+    return slots
+
+
+def current_slot(mode, now=None):
+    """Dernier créneau de ce mode à l'heure courante ou avant : un cron en retard ou relancé garde son créneau."""
+    t = (now or datetime.datetime.utcnow()).replace(minute=0, second=0, microsecond=0)
+    while SLOT_MODES.get(t.hour) != mode:
+        t -= datetime.timedelta(hours=1)
+    return t
+
+
+def load_ready():
+    return load_json(READY_MANIFEST) if os.path.exists(READY_MANIFEST) else []
+
+
+def remove_ready_files(item):
+    for path in set(item["files"].values()):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def prune_ready(before=None):
+    """
+    Retire de la file les éléments dont un fichier manque : leur créneau sera
+    pré-rendu de nouveau. Avec before (clé de créneau), un élément d'un créneau
+    passé est reporté au même créneau du lendemain (même heure, donc même
+    catégorie et même titre), ou supprimé si ce créneau est déjà en file.
+    """
+    queue, kept = load_ready(), []
+    taken = {item["slot"] for item in queue}
+    for item in queue:
+        if not all(os.path.exists(p) for p in item["files"].values()):
+            print(f"🗑️  Pré-rendu {item['slot']}h UTC incomplet : retiré")
+            remove_ready_files(item)
+            continue
+        if before and item["slot"] < before:
+            t = datetime.datetime.strptime(item["slot"], SLOT_FORMAT)
+            while slot_key(t) < before:
+                t += datetime.timedelta(days=1)
+            if slot_key(t) in taken:
+                print(f"🗑️  Pré-rendu {item['slot']}h UTC périmé : retiré")
+                remove_ready_files(item)
+                continue
+            print(f"↪️  Pré-rendu {item['slot']}h UTC reporté à {slot_key(t)}h UTC")
+            item["slot"] = slot_key(t)
+            taken.add(item["slot"])
+        kept.append(item)
+    if queue:
+        save_json(READY_MANIFEST, kept)
+    return kept
+
+
+def next_ready(mode, now=None):
+    """Élément pré-rendu pour le créneau courant de ce mode, sinon None (la file est d'abord nettoyée)."""
+    slot = slot_key(current_slot(mode, now))
+    for item in prune_ready(before=slot):
+        if item["slot"] == slot and item["mode"] == mode:
+            return item
+    return None
+
+
+def drop_ready(item):
+    remove_ready_files(item)
+    save_json(READY_MANIFEST, [it for it in load_ready() if it["slot"] != item["slot"]])
+
+
+def prerender(n=3):
+    """
+    Sélectionne et rend les n prochains créneaux dans ready/. Les index de
+    progress.json sont réservés immédiatement : le créneau n'a plus qu'à publier.
+    """
+    progress = load_json(PROGRESS_FILE)
+    queue = prune_ready()
+    queued = {item["slot"] for item in queue}
+    os.makedirs(READY_DIR, exist_ok=True)
+    try:
+        for t, mode in next_slots(n):
+            slot = slot_key(t)
+            if slot in queued:
+                continue
+            print(f"⏳ Pré-rendu {slot}h UTC — {mode}")
+            with telemetry.span("prerender", slot=slot, mode=mode):
+                item = PREPARE[mode](progress, t.hour)
+            item["slot"] = slot
+            moved = {}  # plusieurs destinations peuvent partager un fichier (export_stills)
+            for name, path in item["files"].items():
+                if path not in moved:
+                    moved[path] = os.path.join(READY_DIR, f"{slot}_{os.path.basename(path)}")
+                    os.replace(path, moved[path])
+                item["files"][name] = moved[path]
+            queue.append(item)
+            save_json(READY_MANIFEST, queue)
+            save_json(PROGRESS_FILE, progress)
+    finally:
+        telemetry.dump("prerender")
+    print(f"✅ File prête : {len(queue)} élément(s).")
+
+
+def run(mode):
+    """Publie l'élément pré-rendu du mode s'il existe, sinon sélectionne et rend sur place."""
+    try:
+        with telemetry.span("run", mode=mode):
+            item = next_ready(mode)
+            if item is not None:
+                print(f"📦 Pré-rendu {item['slot']}h UTC")
+                telemetry.record(ready=item["slot"])
+                PUBLISH[mode](item)
+                drop_ready(item)
+            else:
+                progress = load_json(PROGRESS_FILE)
+                PUBLISH[mode](PREPARE[mode](progress))
+                save_json(PROGRESS_FILE, progress)
+    finally:
+        telemetry.dump(mode)
+    print(f"✅ Terminé ({mode}).")
+
+
+# ---------------------------------------------------
+# MAIN
+# ---------------------------------------------------
+def main():
+    run("image")
+
+
+def main_reel():
+    run("reel")
+
+
+def main_parabole():
+    run("parabole")
 
 
 if __name__ == "__main__":
@@ -1105,5 +1296,7 @@ if __name__ == "__main__":
         main_reel()
     elif len(sys.argv) > 1 and sys.argv[1] == "parabole":
         main_parabole()
+    elif len(sys.argv) > 1 and sys.argv[1] == "prerender":
+        prerender(int(sys.argv[2]) if len(sys.argv) > 2 else 3)
     else:
         main()
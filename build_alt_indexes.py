@@ -1,6 +1,8 @@
 import os, json, random, re
+from functools import lru_cache
 
 BIBLE_DIR = "bible"
+BOOK_CACHE = 8  # livros mantidos em memória (um post diário lê um só)
 
 GOSPELS = {"Matthieu", "Marc", "Luc", "Jean"}
 
@@ -48,11 +50,14 @@ def safe_filename(name: str) -> str:
     t = re.sub(r"[^a-z0-9]+", "_", t).strip("_")
     return t
 
+@lru_cache(maxsize=BOOK_CACHE)
 def load_book(book_name: str) -> dict:
+    # Só o arquivo do livro é lido; o dict devolvido é partilhado (não modificar)
     path = os.path.join(BIBLE_DIR, safe_filename(book_name) + ".json")
     with open(path, "r", encoding="utf-8") as f:
         data = json.load(f)
-    return data[book_name]
+    # um livro por arquivo: a chave exata dispensa a caixa usada por quem chama
+    return next(iter(data.values()))
 
 def list_books() -> list[str]:
     books = []
@@ -176,6 +176,8 @@ def main():
     if created < 60:
         raise RuntimeError(f"Foram gerados só {created} livros. Algo mudou no zip/formato.")
     print(f"OK: {created} livros gerados em {OUT_DIR}/")
+    import bible_pack  # importa este módulo: aqui evita o import circular
+    bible_pack.build()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,101 @@
+"""
+draft.py — Brouillons : relire une mise en page en quelques secondes
+
+Rendu au quart de la résolution, à 10 images/s, sans audio ni cache de rendu.
+La mise en page (polices, retours à la ligne, palette, poussière) est celle de
+la publication : seule la sortie est réduite.
+
+    python draft.py verse psaumes_curated.json 12    # entrée n°12 : image + reel
+    python draft.py parabole 3                       # 4e parabole de paraboles_curated.json
+    python draft.py holy 2026-04-03                  # image + reel de la Semaine Sainte
+    python draft.py check psaumes_curated.json       # planches de toutes les entrées (CI)
+
+--sheet : planches contact (JPEG) au lieu des MP4 réduits. Sorties dans --out (défaut drafts/).
+"""
+import argparse
+import os
+import sys
+
+# Secrets factices : bot.py et holy_week.py les lisent à l'import
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "draft")
+os.environ.setdefault("TELEGRAM_CHANNEL", "draft")
+
+import bot
+import holy_week
+from build_alt_indexes import load_book
+
+PARABOLES = "paraboles_curated.json"
+
+
+def verse_text(book, ch, v):
+    """Texte nettoyé, tel que le publie pick_verse."""
+    return bot.clean_text(bot.strip_rubric(load_book(book)[str(ch)][str(v)]))
+
+
+def draft_verse(entry, out, ext):
+    book, ch, v = entry
+    text, ref = verse_text(book, ch, v), f"{book} {ch}:{v}"
+    return [bot.make_image(text, ref, draft=f"{out}_image.jpg"),
+            bot.make_reel_video(text, ref, draft=f"{out}_reel{ext}")]
+
+
+def draft_parabole(entry, out, ext):
+    verses = [(v["ref"], v["text"]) for v in entry["verses"]]
+    return [bot.make_parabole_video(entry["title"], verses, draft=f"{out}{ext}")]
+
+
+def draft_holy(day, out, ext):
+    day_data = holy_week.HOLY_WEEK[day]
+    return [holy_week.make_holy_week_image(day_data, draft=f"{out}_image.jpg"),
+            holy_week.make_holy_week_reel(day_data, draft=f"{out}_reel{ext}")]
+
+
+def check(paths, out_dir):
+    """Planche de chaque entrée des listes ; retourne les entrées en échec."""
+    failures = []
+    for path in paths:
+        name = os.path.splitext(os.path.basename(path))[0]
+        os.makedirs(os.path.join(out_dir, name), exist_ok=True)
+        draft = draft_parabole if os.path.basename(path) == PARABOLES else draft_verse
+        entries = bot.load_json(path)
+        for i, entry in enumerate(entries):
+            try:
+                draft(entry, os.path.join(out_dir, name, f"{i:03d}"), ".jpg")
+            except Exception as e:
+                failures.append(f"{path}[{i}] {entry if draft is draft_verse else entry['title']} : {e}")
+                print(f"❌ {failures[-1]}", file=sys.stderr)
+        print(f"📋 {path} : {len(entries)} entrées", file=sys.stderr)
+    return failures
+
+
+def main():
+    p = argparse.ArgumentParser(description="Brouillons rapides (bot.py, holy_week.py)")
+    p.add_argument("--out", default="drafts", help="dossier de sortie (défaut : drafts)")
+    p.add_argument("--sheet", action="store_true", help="planches contact au lieu des MP4 réduits")
+    sub = p.add_subparsers(dest="mode", required=True)
+    s = sub.add_parser("verse", help="une entrée d'une liste curated")
+    s.add_argument("list")
+    s.add_argument("index", type=int)
+    s = sub.add_parser("parabole", help=f"une parabole de {PARABOLES}")
+    s.add_argument("index", type=int)
+    s = sub.add_parser("holy", help="un jour de la Semaine Sainte (AAAA-MM-JJ)")
+    s.add_argument("day", choices=sorted(holy_week.HOLY_WEEK))
+    s = sub.add_parser("check", help="planches de toutes les entrées des listes (code 1 si échec)")
+    s.add_argument("lists", nargs="+")
+    args = p.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    ext = ".jpg" if args.sheet else ".mp4"
+    if args.mode == "verse":
+        name = os.path.splitext(os.path.basename(args.list))[0]
+        draft_verse(bot.load_json(args.list)[args.index], os.path.join(args.out, f"{name}_{args.index:03d}"), ext)
+    elif args.mode == "parabole":
+        draft_parabole(bot.load_json(PARABOLES)[args.index], os.path.join(args.out, f"parabole_{args.index:03d}"), ext)
+    elif args.mode == "holy":
+        draft_holy(args.day, os.path.join(args.out, f"holy_{args.day}"), ext)
+    elif check([path for path in args.lists if os.path.exists(path)], args.out):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,15 @@
 holy_week.py — Publications spéciales Semaine Sainte 2026
 Publie images + reels en extra (en plus des publications normales)
 """
-import os, json, datetime, hashlib, math, subprocess, requests, shutil
+import os, json, datetime, functools, hashlib, math, requests
 import numpy as np
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
+import music
+import telemetry
+from particles import Particles
+from render import (FONT_SANS, FONT_SERIF, FONT_SERIF_BOLD, Layer, ThumbnailSink, Timeline, compose, draft_image,
+                    draw_layer, export_stills, fit_text, gradient, ink_width, load_font, render_draft, render_video,
+                    text_layer, text_width, wrap_words)
 
 # ── Secrets ──
 TOKEN                 = os.environ["TELEGRAM_BOT_TOKEN"]
@@ -21,9 +27,6 @@ YT_CLIENT_ID          = os.environ.get("YOUTUBE_CLIENT_ID", "")
 YT_CLIENT_SECRET      = os.environ.get("YOUTUBE_CLIENT_SECRET", "")
 YT_REFRESH_TOKEN      = os.environ.get("YOUTUBE_REFRESH_TOKEN", "")
 
-FONT_SERIF      = "/usr/share/fonts/truetype/dejavu/DejaVuSerif.ttf"
-FONT_SERIF_BOLD = "/usr/share/fonts/truetype/dejavu/DejaVuSerif-Bold.ttf"
-FONT_SANS       = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
 WATERMARK       = "LaBible.app"
 MINI_APP_URL    = "https://t.me/BIBLE_APP_BOT/labible"
 APP_URL         = "https://labible.app"
@@ -315,38 +318,26 @@ def add_decorations(layer, deco_type, W, H, accent, alpha_base=22):
         draw_rays(d, W*2//3, H//3, 200, accent, alpha_base-5)
         draw_cross(d, W*3//4, H//4, 60, accent, alpha_base-8)
 
+@functools.lru_cache(maxsize=16)
+def deco_layer(deco_type, W, H, accent, alpha_base):
+    """
+    Décor rastérisé une seule fois, à pleine opacité : le canal alpha dessiné par
+    add_decorations devient le masque d'un Layer couleur accent. Un fondu n'est
+    plus qu'un Layer.blend(frame, a), le masque multiplié par a.
+    """
+    layer = Image.new("RGBA", (W, H), (0,0,0,0))
+    add_decorations(layer, deco_type, W, H, accent, alpha_base)
+    return Layer(layer.getchannel("A"), accent)
 
 # ── Helpers texte ──
 def wrap_text(draw, text, font, max_w):
-    words = text.split()
-    if not words: return [""]
-    lines, current = [], words[0]
-    for w in words[1:]:
-        test = current + " " + w
-        if draw.textlength(test, font=font) <= max_w:
-            current = test
-        else:
-            lines.append(current)
-            current = w
-    lines.append(current)
+    lines = wrap_words(text, font, max_w)
     if len(lines) >= 2 and len(lines[-1].strip()) <= 2:
         lines[-2] += " " + lines.pop()
     return lines
 
 def wrap_text_with_quotes(draw, text, font, max_w):
-    words = text.split()
-    if not words: return [""]
-    q_open = draw.textlength("« ", font=font)
-    lines, current = [], words[0]
-    for w in words[1:]:
-        test = current + " " + w
-        margin = q_open if len(lines) == 0 else 0
-        if draw.textlength(test, font=font) + margin <= max_w:
-            current = test
-        else:
-            lines.append(current)
-            current = w
-    lines.append(current)
+    lines = wrap_words(text, font, max_w, first_margin=text_width(font, "« "))
     if lines:
         lines[0]  = "« " + lines[0]
         lines[-1] = lines[-1] + " »"
@@ -354,21 +345,14 @@ def wrap_text_with_quotes(draw, text, font, max_w):
 
 
 # ── Génération image 1080×1080 ──
-def make_holy_week_image(day_data):
+@telemetry.timed
+def make_holy_week_image(day_data, draft=None):
+    """holy_week.png ; draft : chemin d'un brouillon réduit, rendu à la place."""
     pal = PALETTES_HW[day_data["palette"]]
     BG, BG2, BORDER, TEXT, ACCENT = pal["bg"], pal["bg2"], pal["border"], pal["text"], pal["accent"]
     W, H = 1080, 1080
 
-    img = Image.new("RGB", (W, H))
-    draw = ImageDraw.Draw(img)
-    for y in range(H):
-        t = y/H
-        c = tuple(int(BG[i] + t*(BG2[i]-BG[i])) for i in range(3))
-        draw.line([(0,y),(W,y)], fill=c)
-
-    deco_layer = Image.new("RGBA", (W, H), (0,0,0,0))
-    add_decorations(deco_layer, day_data["deco"], W, H, ACCENT, 22)
-    img = Image.alpha_composite(img.convert("RGBA"), deco_layer).convert("RGB")
+    img = Image.fromarray(compose(gradient(W, H, BG, BG2), [(deco_layer(day_data["deco"], W, H, ACCENT, 22), 1.0)]))
     draw = ImageDraw.Draw(img)
 
     m = 55
@@ -376,27 +360,16 @@ def make_holy_week_image(day_data):
     draw.rounded_rectangle([m+14,m+14,W-m-14,H-m-14], radius=26, outline=(*BORDER,80), width=1)
     draw.line([(m+40,m+40),(W-m-40,m+40)], fill=BORDER, width=1)
 
-    font_theme = ImageFont.truetype(FONT_SANS, 22)
+    font_theme = load_font(FONT_SANS, 22)
     theme_text = day_data["emoji"] + "  " + day_data["theme"].upper()
-    tw = draw.textlength(theme_text, font=font_theme)
-    draw.text(((W-tw)//2, m+52), theme_text, font=font_theme, fill=ACCENT)
+    draw.text(((W-text_width(font_theme, theme_text))//2, m+52), theme_text, font=font_theme, fill=ACCENT)
     draw.line([(m+40,m+88),(W-m-40,m+88)], fill=(*BORDER,100), width=1)
 
     pad_x, top, bottom = 130, 200, 300
     max_w, max_h = W-2*pad_x, H-top-bottom
 
-    chosen_font = chosen_lines = chosen_lh = None
-    for size in range(62, 30, -2):
-        font = ImageFont.truetype(FONT_SERIF, size)
-        lines = wrap_text(draw, day_data["verse"], font, max_w)
-        lh = int(size*1.42)
-        if lh*len(lines) <= max_h:
-            chosen_font, chosen_lines, chosen_lh = font, lines, lh
-            break
-    if chosen_font is None:
-        chosen_font = ImageFont.truetype(FONT_SERIF, 30)
-        chosen_lines = wrap_text(draw, day_data["verse"], chosen_font, max_w)
-        chosen_lh = int(30*1.42)
+    chosen_font, chosen_lines, chosen_lh = fit_text(draw, day_data["verse"], FONT_SERIF, wrap_text, max_w, max_h,
+                                                    30, 62, lambda size: int(size*1.42))
 
     if chosen_lines:
         chosen_lines[0]  = "« " + chosen_lines[0]
@@ -405,162 +378,139 @@ def make_holy_week_image(day_data):
     total_h = chosen_lh * len(chosen_lines)
     y = top + max(0, (max_h-total_h)//2)
     for line in chosen_lines:
-        lw = draw.textlength(line, font=chosen_font)
-        x = (W-lw)//2
+        x = (W-text_width(chosen_font, line))//2
         draw.text((x+2,y+2), line, font=chosen_font, fill=(0,0,0))
         draw.text((x,y),     line, font=chosen_font, fill=TEXT)
         y += chosen_lh
 
     draw.line([(pad_x,H-260),(W-pad_x,H-260)], fill=BORDER, width=2)
-    font_ref = ImageFont.truetype(FONT_SERIF_BOLD, 38)
-    font_sub = ImageFont.truetype(FONT_SANS, 26)
-    rw = draw.textlength(day_data["ref"], font=font_ref)
-    draw.text(((W-rw)//2, H-238), day_data["ref"], font=font_ref, fill=ACCENT)
-    ww = draw.textlength(WATERMARK, font=font_sub)
-    draw.text(((W-ww)//2, H-192), WATERMARK, font=font_sub, fill=ACCENT)
-
+    font_ref = load_font(FONT_SERIF_BOLD, 38)
+    font_sub = load_font(FONT_SANS, 26)
+    draw.text(((W-text_width(font_ref, day_data["ref"]))//2, H-238), day_data["ref"], font=font_ref, fill=ACCENT)
+    draw.text(((W-text_width(font_sub, WATERMARK))//2, H-192), WATERMARK, font=font_sub, fill=ACCENT)
+
+    if draft:
+        draft_image(img).save(draft)
+        return draft
     out = "holy_week.png"
     img.save(out, "PNG")
     return out
 
 
 # ── Génération reel 1080×1920 ──
-def make_holy_week_reel(day_data, music_dir="music"):
+REEL_SECS = 15
+
+@telemetry.timed
+def make_holy_week_reel(day_data, music_dir="music", sinks=(), draft=None):
+    """
+    {"compat": reel, "cover": image de couverture JPEG tirée de la même passe}
+    draft : chemin d'un brouillon (.mp4 réduit ou planche contact) rendu à la place.
+    """
+    if draft:
+        return render_draft(holy_week_timeline(day_data), draft)
+    import glob, random as _random
+    output, cover = "holy_reel.mp4", "holy_reel_cover.jpg"
+    if music_dir == music.MUSIC_DIR:
+        music_files = music.tracks()
+    else:
+        music_files = glob.glob(f"{music_dir}/*.mp3") + glob.glob(f"{music_dir}/*.m4a")
+    track = _random.choice(music_files) if music_files else None
+    audio = track and (music.clips(track, REEL_SECS, ["compat"]) or track)
+    tl = holy_week_timeline(day_data)
+    render_video(tl, {"compat": output}, audio=audio, audio_ss=music.start(track), sinks=[ThumbnailSink(cover, tl.hero), *sinks])
+    return {"compat": output, "cover": cover}
+
+@telemetry.timed
+def holy_week_timeline(day_data):
     pal = PALETTES_HW[day_data["palette"]]
     BG, BG2, BORDER, TEXT, ACCENT = pal["bg"], pal["bg2"], pal["border"], pal["text"], pal["accent"]
     W, H = 1080, 1920
-    FPS = 30; DURATION = 15; TOTAL = FPS * DURATION
+    FPS = 30; DURATION = REEL_SECS; TOTAL = FPS * DURATION
 
-    def blend(base, a, bg=BG):
-        a = max(0,min(1,a))
-        return tuple(int(bg[i]+(base[i]-bg[i])*a) for i in range(3))
     def ease(t): t=max(0,min(1,t)); return t*t*(3-2*t)
 
     tmp = Image.new("RGB",(10,10)); d = ImageDraw.Draw(tmp)
     BPAD = 100; CPAD = 100; MAX_TW = W-BPAD*2-CPAD*2
-    size = 80
-    while size > 30:
-        fv = ImageFont.truetype(FONT_SERIF, size)
-        lines = wrap_text_with_quotes(d, day_data["verse"], fv, MAX_TW)
-        lh = size+22
-        if lh*len(lines) <= int((H-BPAD*2)*0.52): break
-        size -= 2
-
-    fv = ImageFont.truetype(FONT_SERIF, size)
-    d2 = ImageDraw.Draw(Image.new("RGB",(10,10)))
-    verse_lines = wrap_text_with_quotes(d2, day_data["verse"], fv, MAX_TW)
-    LINE_H = size+22
-
-    fr = ImageFont.truetype(FONT_SERIF_BOLD, 40)
-    ft = ImageFont.truetype(FONT_SANS, 28)
-    fth = ImageFont.truetype(FONT_SANS, 24)
+    fv, verse_lines, LINE_H = fit_text(d, day_data["verse"], FONT_SERIF, wrap_text_with_quotes, MAX_TW,
+                                       int((H-BPAD*2)*0.52), 30, 80, lambda size: size+22)
+
+    fr = load_font(FONT_SERIF_BOLD, 40)
+    ft = load_font(FONT_SANS, 28)
+    fth = load_font(FONT_SANS, 24)
 
     CX1,CY1,CX2,CY2 = BPAD, BPAD, W-BPAD, H-BPAD
 
     rng = np.random.default_rng(99)
-    N = 25
-    px = rng.uniform(CX1+20, CX2-20, N)
-    py = rng.uniform(CY1+20, CY2-20, N)
-    ps = rng.uniform(0.2, 0.7, N)
-    pr = rng.uniform(2, 5, N)
-    pa = rng.uniform(0, 2*math.pi, N)
+    dust = Particles(rng, 25, (CX1, CY1, CX2, CY2), W, H, TOTAL, ACCENT, BG, FPS,
+                     speed=(0.2, 0.7), drift=18, rise=10, tint=0.5, peak=80)
 
     start_y = int(CY1+(CY2-CY1)*0.44 - len(verse_lines)*LINE_H//2)
     FL = CY2-220; FT = CY2-195
 
-    os.makedirs("hw_frames", exist_ok=True)
+    # ── Calques statiques : rendus une fois, seule l'opacité varie ──
+    bg = gradient(W, H, BG, shade=0.35, band=4)
 
-    for f in range(TOTAL):
+    deco   = deco_layer(day_data["deco"], W, H, ACCENT, 15)
+    card   = draw_layer(W, H, BG, lambda d: d.rounded_rectangle([CX1,CY1,CX2,CY2], radius=40, fill=230))
+    border = draw_layer(W, H, BORDER, lambda d: d.rounded_rectangle([CX1,CY1,CX2,CY2], radius=40, outline=255, width=5))
+    inner  = draw_layer(W, H, BORDER, lambda d: d.rounded_rectangle([CX1+12,CY1+12,CX2-12,CY2-12], radius=34, outline=255, width=1))
+    backdrop = compose(bg, [(deco,1.0), (card,1.0), (border,1.0), (inner,0.3)])
+    frame = np.empty_like(bg)  # tampon unique, réécrit à chaque image
+
+    theme_text = day_data["emoji"] + "  " + day_data["theme"].upper()
+    theme_l  = text_layer(W, H, [(((W-text_width(fth, theme_text))//2, CY1+30), theme_text, fth)], ACCENT)
+    theme_ln = draw_layer(W, H, BORDER, lambda d: d.line([(CX1+60,CY1+65),(CX2-60,CY1+65)], fill=255, width=1))
+
+    line_layers = []
+    for i,line in enumerate(verse_lines):
+        line_layers.append(text_layer(W, H, [(((W-ink_width(fv, line))//2, start_y+i*LINE_H), line, fv)], TEXT, shadow=0.5))
+
+    lx1=CX1+CPAD; lx2=CX2-CPAD
+    foot_line = draw_layer(W, H, BORDER, lambda d: d.line([(lx1,FL),(lx2,FL)], fill=255, width=2))
+    foot_ref  = text_layer(W, H, [(((W-text_width(fr, day_data["ref"]))//2,FT), day_data["ref"], fr)], ACCENT)
+    foot_wm   = text_layer(W, H, [(((W-text_width(ft, WATERMARK))//2,FT+50), WATERMARK, ft)], ACCENT)
+
+    def render_frame(f):
         s = f/FPS
         alpha = ease(s/0.8) if s < 0.8 else (ease((DURATION-s)/1.5) if s > DURATION-1.5 else 1.0)
 
-        img = Image.new("RGB",(W,H),BG)
-        draw = ImageDraw.Draw(img)
-        for y in range(0,H,4):
-            t2 = y/H
-            bg_y = tuple(max(0,int(BG[i]*(1-t2*0.35))) for i in range(3))
-            draw.rectangle([(0,y),(W,min(y+4,H))], fill=bg_y)
-
-        deco_layer = Image.new("RGBA",(W,H),(0,0,0,0))
-        add_decorations(deco_layer, day_data["deco"], W, H, ACCENT, int(15*alpha))
-        img = Image.alpha_composite(img.convert("RGBA"), deco_layer).convert("RGB")
-        draw = ImageDraw.Draw(img)
-
-        cl = Image.new("RGBA",(W,H),(0,0,0,0))
-        cd = ImageDraw.Draw(cl)
-        cd.rounded_rectangle([CX1,CY1,CX2,CY2], radius=40, fill=(*BG,int(alpha*230)))
-        img = Image.alpha_composite(img.convert("RGBA"), cl).convert("RGB")
-        draw = ImageDraw.Draw(img)
-        draw.rounded_rectangle([CX1,CY1,CX2,CY2], radius=40, outline=blend(BORDER,alpha), width=5)
-        draw.rounded_rectangle([CX1+12,CY1+12,CX2-12,CY2-12], radius=34, outline=blend(BORDER,alpha*0.3), width=1)
+        if alpha >= 1:
+            np.copyto(frame, backdrop)
+        else:
+            np.copyto(frame, bg)
+            for layer, a in [(deco,alpha), (card,alpha), (border,alpha), (inner,alpha*0.3)]:
+                layer.blend(frame, a)
 
         th_a = min(1.0,s/0.5)*alpha
-        theme_text = day_data["emoji"] + "  " + day_data["theme"].upper()
-        tw = draw.textlength(theme_text, font=fth)
-        draw.text(((W-tw)//2, CY1+30), theme_text, font=fth, fill=blend(ACCENT,th_a))
-        draw.line([(CX1+60,CY1+65),(CX2-60,CY1+65)], fill=blend(BORDER,th_a*0.6), width=1)
-
-        pl = Image.new("RGBA",(W,H),(0,0,0,0))
-        pd = ImageDraw.Draw(pl)
-        for i in range(N):
-            tp = s*ps[i]
-            cx = int((px[i]+math.sin(tp*0.5+pa[i])*18)%W)
-            cy = int((py[i]-s*ps[i]*10)%H)
-            r  = int(pr[i])
-            bright = (math.sin(tp+pa[i])+1)/2*0.3+0.1
-            a_p = int(bright*alpha*80)
-            gc = blend(ACCENT,bright*0.5)
-            pd.ellipse([(cx-r,cy-r),(cx+r,cy+r)], fill=(*gc,a_p))
-        img = Image.alpha_composite(img.convert("RGBA"), pl).convert("RGB")
-        draw = ImageDraw.Draw(img)
-
-        for i,line in enumerate(verse_lines):
+        theme_l.blend(frame, th_a)
+        theme_ln.blend(frame, th_a*0.6)
+
+        dust.draw(frame, f, alpha)
+
+        for i,layer in enumerate(line_layers):
             ls = 0.6+i*0.18; le = ls+0.5
             la = (0 if s<ls else (ease((s-ls)/(le-ls)) if s<le else 1.0))*alpha
-            bbox = draw.textbbox((0,0),line,font=fv); tw2 = bbox[2]-bbox[0]
-            x = (W-tw2)//2; y = start_y+i*LINE_H
-            draw.text((x+2,y+2), line, font=fv, fill=blend((0,0,0),la*0.5))
-            draw.text((x,y),     line, font=fv, fill=blend(TEXT,la))
+            layer.blend(frame, la)
 
         fs = 0.6+len(verse_lines)*0.18+0.3
         fa = (0 if s<fs else (ease((s-fs)/0.6) if s<fs+0.6 else 1.0))*alpha
-        lx1=CX1+CPAD; lx2=CX2-CPAD
-        draw.line([(lx1,FL),(lx2,FL)], fill=blend(BORDER,fa*0.8), width=2)
-        rw = draw.textlength(day_data["ref"], font=fr)
-        draw.text(((W-rw)//2,FT), day_data["ref"], font=fr, fill=blend(ACCENT,fa))
-        ww = draw.textlength(WATERMARK, font=ft)
-        draw.text(((W-ww)//2,FT+50), WATERMARK, font=ft, fill=blend(ACCENT,fa*0.7))
-
-        img.save(f"hw_frames/frame_{f:04d}.png")
+        foot_line.blend(frame, fa*0.8)
+        foot_ref.blend(frame, fa)
+        foot_wm.blend(frame, fa*0.7)
 
-    import glob, random as _random
-    output = "holy_reel.mp4"
-    music_files = glob.glob(f"{music_dir}/*.mp3") + glob.glob(f"{music_dir}/*.m4a")
-    if music_files:
-        music = _random.choice(music_files)
-        subprocess.run([
-            'ffmpeg','-framerate','30','-i','hw_frames/frame_%04d.png',
-            '-ss','2','-i', music,
-            '-c:v','libx264','-profile:v','baseline','-level','3.1',
-            '-pix_fmt','yuv420p','-crf','22',
-            '-c:a','aac','-b:a','128k','-ar','44100',
-            '-movflags','+faststart','-shortest',
-            output,'-y'
-        ], capture_output=True)
-    else:
-        subprocess.run([
-            'ffmpeg','-framerate','30','-i','hw_frames/frame_%04d.png',
-            '-c:v','libx264','-profile:v','baseline','-level','3.1',
-            '-pix_fmt','yuv420p','-crf','22',
-            '-movflags','+faststart',
-            output,'-y'
-        ], capture_output=True)
+        return frame
 
-    shutil.rmtree("hw_frames", ignore_errors=True)
-    return output
+    # Couverture : première image où le pied de carte a fini d'apparaître
+    hero = math.ceil((0.6+len(verse_lines)*0.18+0.3+0.6)*FPS)
+    return Timeline(render_frame, TOTAL, W, H, FPS, hero)
 
 
 # ── Upload / Publication ──
+def jpeg_part(path):
+    with open(path,"rb") as f:
+        return os.path.basename(path), f.read(), "image/jpeg"
+
+@telemetry.timed
 def upload_to_cloudinary(path, resource="image"):
     import time as _t
     if not CLOUDINARY_CLOUD_NAME: return upload_to_imgbb(path)
@@ -572,110 +522,134 @@ def upload_to_cloudinary(path, resource="image"):
             data={"api_key":CLOUDINARY_API_KEY,"timestamp":timestamp,"signature":sig},
             files={"file":f}, timeout=180
         )
+        telemetry.http(r)
     if r.status_code == 200:
-        _t.sleep(3 if resource=="image" else 5)
+        telemetry.sleep(3 if resource=="image" else 5)
         return r.json()["secure_url"]
     return upload_to_imgbb(path) if resource=="image" else None
 
+@telemetry.timed
 def upload_to_imgbb(path):
     if not IMGBB_API_KEY: return None
-    import time
     with open(path,"rb") as f:
         r = requests.post("https://api.imgbb.com/1/upload",
                           params={"key":IMGBB_API_KEY}, files={"image":f}, timeout=60)
+        telemetry.http(r)
     if r.status_code == 200:
-        time.sleep(5); return r.json()["data"]["url"]
+        telemetry.sleep(5); return r.json()["data"]["url"]
     return None
 
+@telemetry.timed
 def post_telegram_photo(path, caption):
     markup = json.dumps({"inline_keyboard":[[{"text":"📖 Lire dans LaBible.app","url":MINI_APP_URL}]]})
     with open(path,"rb") as f:
         r = requests.post(f"https://api.telegram.org/bot{TOKEN}/sendPhoto",
                           data={"chat_id":CHANNEL,"caption":caption,"parse_mode":"HTML","reply_markup":markup},
                           files={"photo":f}, timeout=30)
+        telemetry.http(r)
     r.raise_for_status(); print("✅ Telegram image publié")
 
-def post_telegram_video(path, caption):
+@telemetry.timed
+def post_telegram_video(path, caption, cover=None):
     markup = json.dumps({"inline_keyboard":[[{"text":"📖 Lire dans LaBible.app","url":MINI_APP_URL}]]})
+    data = {"chat_id":CHANNEL,"caption":caption,"parse_mode":"HTML","reply_markup":markup}
     with open(path,"rb") as f:
-        r = requests.post(f"https://api.telegram.org/bot{TOKEN}/sendVideo",
-                          data={"chat_id":CHANNEL,"caption":caption,"parse_mode":"HTML","reply_markup":markup},
-                          files={"video":f}, timeout=60)
+        files = {"video":f}
+        if cover: data["cover"], files["cover"] = "attach://cover", jpeg_part(cover)
+        r = requests.post(f"https://api.telegram.org/bot{TOKEN}/sendVideo", data=data, files=files, timeout=60)
+        telemetry.http(r)
     r.raise_for_status(); print("✅ Telegram vidéo publié")
 
+@telemetry.timed
 def post_facebook_photo(path, caption):
     if not FB_PAGE_TOKEN: return
     with open(path,"rb") as f:
         r = requests.post(f"https://graph.facebook.com/v25.0/{FB_PAGE_ID}/photos",
                           data={"message":caption,"access_token":FB_PAGE_TOKEN},
                           files={"source":f}, timeout=60)
+        telemetry.http(r)
     print(f"✅ Facebook image — {r.json().get('id','?')}" if r.status_code==200 else f"❌ Facebook ({r.status_code}): {r.text}")
 
-def post_facebook_reel(path, caption):
+@telemetry.timed
+def post_facebook_reel(path, caption, cover=None):
     if not FB_PAGE_TOKEN: return
     with open(path,"rb") as f:
+        files = {"source":f, "thumb":jpeg_part(cover)} if cover else {"source":f}
         r = requests.post(f"https://graph.facebook.com/v25.0/{FB_PAGE_ID}/videos",
                           data={"description":caption,"access_token":FB_PAGE_TOKEN},
-                          files={"source":f}, timeout=120)
+                          files=files, timeout=120)
+        telemetry.http(r)
     print(f"✅ Facebook reel — {r.json().get('id','?')}" if r.status_code==200 else f"❌ Facebook reel ({r.status_code}): {r.text}")
 
+@telemetry.timed
 def post_instagram_image(path, caption):
     if not FB_PAGE_TOKEN: return
     url = upload_to_cloudinary(path, "image")
     if not url: return
-    if "cloudinary.com" in url: url = url.replace("/upload/","/upload/f_jpg/")
     r = requests.post(f"https://graph.facebook.com/v25.0/{IG_ACCOUNT_ID}/media",
                       data={"image_url":url,"caption":caption,"access_token":FB_PAGE_TOKEN}, timeout=60)
+    telemetry.http(r)
     if r.status_code!=200: print(f"❌ IG container ({r.status_code}): {r.text}"); return
     cid = r.json().get("id")
-    import time
-    for _ in range(8):
-        time.sleep(10)
+    for attempt in range(8):
+        telemetry.sleep(10)
         rs = requests.get(f"https://graph.facebook.com/v25.0/{cid}",
                           params={"fields":"status_code","access_token":FB_PAGE_TOKEN}, timeout=30)
+        telemetry.http(rs)
         s = rs.json().get("status_code","")
+        telemetry.record(polls=attempt+1)
         if s=="FINISHED": break
         if s=="ERROR": print("❌ IG ERROR"); return
     r2 = requests.post(f"https://graph.facebook.com/v25.0/{IG_ACCOUNT_ID}/media_publish",
                        data={"creation_id":cid,"access_token":FB_PAGE_TOKEN}, timeout=60)
+    telemetry.http(r2)
     print(f"✅ Instagram image — {r2.json().get('id','?')}" if r2.status_code==200 else f"❌ IG publish ({r2.status_code}): {r2.text}")
 
-def post_instagram_reel(path, caption):
+@telemetry.timed
+def post_instagram_reel(path, caption, cover=None):
     if not FB_PAGE_TOKEN: return
     video_url = upload_to_cloudinary(path, "video")
     if not video_url: return
-    r = requests.post(f"https://graph.facebook.com/v25.0/{IG_ACCOUNT_ID}/media",
-                      data={"media_type":"REELS","video_url":video_url,"caption":caption,
-                            "access_token":FB_PAGE_TOKEN,"thumb_offset":"7500"}, timeout=60)
+    data = {"media_type":"REELS","video_url":video_url,"caption":caption,"access_token":FB_PAGE_TOKEN}
+    cover_url = cover and upload_to_cloudinary(cover, "image")
+    if cover_url: data["cover_url"] = cover_url
+    else: data["thumb_offset"] = "7500"
+    r = requests.post(f"https://graph.facebook.com/v25.0/{IG_ACCOUNT_ID}/media", data=data, timeout=60)
+    telemetry.http(r)
     if r.status_code!=200: print(f"❌ IG reel container ({r.status_code}): {r.text}"); return
     cid = r.json().get("id"); print(f"✅ Container reel IG: {cid}")
-    import time
     for attempt in range(10):
-        time.sleep(15)
+        telemetry.sleep(15)
         rs = requests.get(f"https://graph.facebook.com/v25.0/{cid}",
                           params={"fields":"status_code","access_token":FB_PAGE_TOKEN}, timeout=30)
+        telemetry.http(rs)
         s = rs.json().get("status_code","")
         print(f"  ⏳ {s} (tentative {attempt+1})")
+        telemetry.record(polls=attempt+1)
         if s=="FINISHED": break
         if s=="ERROR": print("❌ IG reel ERROR"); return
     r2 = requests.post(f"https://graph.facebook.com/v25.0/{IG_ACCOUNT_ID}/media_publish",
                        data={"creation_id":cid,"access_token":FB_PAGE_TOKEN}, timeout=60)
+    telemetry.http(r2)
     print(f"✅ Instagram reel — {r2.json().get('id','?')}" if r2.status_code==200 else f"❌ IG reel publish ({r2.status_code}): {r2.text}")
 
+@telemetry.timed
 def post_threads(path, caption):
     if not THREADS_ACCESS_TOKEN: return
     url = upload_to_cloudinary(path, "image")
     if not url: return
-    if "cloudinary.com" in url: url = url.replace("/upload/","/upload/f_jpg/")
     r = requests.post("https://graph.threads.net/v1.0/me/threads",
                       data={"media_type":"IMAGE","image_url":url,"text":caption,"access_token":THREADS_ACCESS_TOKEN}, timeout=60)
+    telemetry.http(r)
     if r.status_code!=200: print(f"❌ Threads ({r.status_code}): {r.text}"); return
-    import time; time.sleep(5)
+    telemetry.sleep(5)
     r2 = requests.post("https://graph.threads.net/v1.0/me/threads_publish",
                        data={"creation_id":r.json().get("id"),"access_token":THREADS_ACCESS_TOKEN}, timeout=60)
+    telemetry.http(r2)
     print(f"✅ Threads — {r2.json().get('id','?')}" if r2.status_code==200 else f"❌ Threads publish ({r2.status_code}): {r2.text}")
 
-def post_youtube(path, day_data):
+@telemetry.timed
+def post_youtube(path, day_data, cover=None):
     if not YT_CLIENT_ID: return
     try:
         from google.oauth2.credentials import Credentials
@@ -697,16 +671,32 @@ def post_youtube(path, day_data):
                 "status":{"privacyStatus":"public","selfDeclaredMadeForKids":False}}
         req = yt.videos().insert(part="snippet,status", body=body,
                                   media_body=MediaFileUpload(path,mimetype="video/mp4",resumable=True))
+        telemetry.record(bytes_sent=os.path.getsize(path))
         response = None
         while response is None:
             _, response = req.next_chunk()
+            telemetry.count("chunks")
         print(f"✅ YouTube — https://youtube.com/shorts/{response.get('id','?')}")
+        if cover:
+            try:
+                yt.thumbnails().set(videoId=response["id"], media_body=MediaFileUpload(cover,mimetype="image/jpeg")).execute()
+                print("✅ Miniature YouTube")
+            except Exception as e:
+                print(f"⚠️  Miniature YouTube: {e}")
     except Exception as e:
         print(f"❌ YouTube: {e}")
 
 
 # ── MAIN ──
 def main():
+    try:
+        with telemetry.span("run", mode="holy_week"):
+            publish_day()
+    finally:
+        telemetry.dump("holy_week")
+
+
+def publish_day():
     today = datetime.datetime.utcnow().strftime("%Y-%m-%d")
     day   = HOLY_WEEK.get(today)
 
@@ -730,19 +720,20 @@ def main():
 
     # ── IMAGE ──
     print("🖼️  Génération image...")
-    img = make_holy_week_image(day)
-    post_telegram_photo(img, caption_tg)
-    post_facebook_photo(img, caption_social)
-    post_instagram_image(img, caption_social)
-    post_threads(img, caption_social)
+    stills = export_stills(make_holy_week_image(day), ["telegram", "facebook", "instagram", "threads"])
+    post_telegram_photo(stills["telegram"], caption_tg)
+    post_facebook_photo(stills["facebook"], caption_social)
+    post_instagram_image(stills["instagram"], caption_social)
+    post_threads(stills["threads"], caption_social)
 
     # ── REEL ──
     print("\n🎬 Génération reel...")
-    reel = make_holy_week_reel(day)
-    post_telegram_video(reel, caption_tg)
-    post_facebook_reel(reel, caption_social)
-    post_instagram_reel(reel, caption_social)
-    post_youtube(reel, day)
+    videos = make_holy_week_reel(day)
+    reel, cover = videos["compat"], videos["cover"]
+    post_telegram_video(reel, caption_tg, cover)
+    post_facebook_reel(reel, caption_social, cover)
+    post_instagram_reel(reel, caption_social, cover)
+    post_youtube(reel, day, cover)
 
     print(f"\n✅ Semaine Sainte complète — {day['theme']}")
 
@@ -0,0 +1,178 @@
+"""
+music.py — Bibliothèque musicale indexée.
+
+Durée, sonie et début utile de chaque piste sont mesurés une seule fois, puis
+chaque piste est pré-encodée en extraits AAC normalisés aux durées exactes des
+vidéos : au rendu, l'audio est simplement copié (-c:a copy), sans décodage MP3.
+
+    python music.py      # (re)construit music/index.json et music/aac/ (incrémental)
+
+Index et extraits sont dérivés des MP3 versionnés : ils vivent ensemble dans
+le cache GitHub Actions, construits par build_music.yml et seulement restaurés
+par les publications.
+"""
+import glob
+import hashlib
+import json
+import os
+import re
+import subprocess
+
+from render import ENCODE_PROFILES
+
+MUSIC_DIR     = "music"
+MUSIC_INDEX   = os.path.join(MUSIC_DIR, "index.json")
+CLIP_DIR      = os.path.join(MUSIC_DIR, "aac")
+EXTENSIONS    = (".mp3", ".m4a", ".ogg")
+DEFAULT_START = 2      # ancien -ss 2 : on saute l'attaque du morceau
+LOUDNORM      = "I=-14:TP=-1.5:LRA=11"
+CLIP_RATE     = "44100"  # loudnorm sort à 192 kHz : chaque extrait est rééchantillonné ici
+
+REEL_SECS = 15
+PARABOLES_FILE = "paraboles_curated.json"
+
+
+def clip_lengths():
+    """Durées (s) des vidéos : reels, semaine sainte, et chaque parabole (4 + 6·versets + 4)."""
+    lengths = {REEL_SECS}
+    if os.path.exists(PARABOLES_FILE):
+        with open(PARABOLES_FILE, "r", encoding="utf-8") as f:
+            lengths |= {8 + 6*len(p["verses"]) for p in json.load(f)}
+    return sorted(lengths)
+
+
+def clip_audio(profile):
+    """Réglages audio effectifs d'un extrait : le -ar 44100 d'un profil est déjà imposé par encode_clip."""
+    args = ENCODE_PROFILES[profile]["audio"]
+    return [a for pair in zip(args[::2], args[1::2]) if pair != ("-ar", CLIP_RATE) for a in pair]
+
+
+def audio_id(profile):
+    """Identifiant court des réglages audio d'un profil : les profils identiques partagent leurs extraits."""
+    raw = json.dumps([clip_audio(profile), LOUDNORM])
+    return hashlib.sha1(raw.encode()).hexdigest()[:8]
+
+
+# ---------------------------------------------------
+# LECTURE — utilisée par bot.py et holy_week.py
+# ---------------------------------------------------
+_index = None
+
+
+def load_index():
+    global _index
+    if _index is None:
+        _index = {}
+        if os.path.exists(MUSIC_INDEX):
+            with open(MUSIC_INDEX, "r", encoding="utf-8") as f:
+                _index = {t["file"]: t for t in json.load(f)["tracks"]}
+    return _index
+
+
+def tracks():
+    """Pistes disponibles, dans un ordre stable (index s'il existe, sinon le dossier)."""
+    return sorted(load_index()) or sorted(p for ext in EXTENSIONS for p in glob.glob(f"{MUSIC_DIR}/*{ext}"))
+
+
+def start(track):
+    return load_index().get(track, {}).get("start", DEFAULT_START)
+
+
+def clips(track, secs, profiles):
+    """{profil: extrait AAC} pour une vidéo de secs secondes, ou None s'il en manque (l'audio sera transcodé)."""
+    entry = load_index().get(track)
+    if not entry:
+        return None
+    by_audio = entry["clips"].get(str(secs), {})
+    out = {p: by_audio.get(audio_id(p)) for p in profiles}
+    return out if all(c and os.path.exists(c) for c in out.values()) else None
+
+
+# ---------------------------------------------------
+# CONSTRUCTION
+# ---------------------------------------------------
+def _ffmpeg_log(args):
+    return subprocess.run(['ffmpeg', '-hide_banner', '-nostats'] + args, capture_output=True, text=True).stderr
+
+
+def probe_duration(path):
+    r = subprocess.run(['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=nw=1:nk=1', path],
+                       capture_output=True, text=True, check=True)
+    return float(r.stdout.strip())
+
+
+def lead_silence(path):
+    """Fin du silence initial (s), 0 si la piste démarre aussitôt."""
+    log = _ffmpeg_log(['-t', '30', '-i', path, '-af', 'silencedetect=n=-50dB:d=0.3', '-f', 'null', '-'])
+    m = re.search(r"silence_start: (-?[\d.]+)\s.*?silence_end: ([\d.]+)", log, re.S)
+    return float(m.group(2)) if m and float(m.group(1)) <= 0.05 else 0.0
+
+
+def measure_loudness(path, ss):
+    """Première passe loudnorm (EBU R128) : valeurs mesurées, réinjectées à l'encodage."""
+    log = _ffmpeg_log(['-ss', str(ss), '-i', path, '-af', f'loudnorm={LOUDNORM}:print_format=json', '-f', 'null', '-'])
+    return json.loads(log[log.rindex("{"):log.rindex("}")+1])
+
+
+def encode_clip(entry, secs, profile, out):
+    m = entry["loudnorm"]
+    af = (f"loudnorm={LOUDNORM}:measured_I={m['input_i']}:measured_TP={m['input_tp']}"
+          f":measured_LRA={m['input_lra']}:measured_thresh={m['input_thresh']}"
+          f":offset={m['target_offset']}:linear=true")
+    subprocess.run(['ffmpeg', '-y', '-loglevel', 'error', '-ss', str(entry["start"]), '-t', str(secs),
+                    '-i', entry["file"], '-vn', '-af', af, '-ar', CLIP_RATE] + clip_audio(profile) + [out],
+                   check=True)
+
+
+def file_digest(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def build():
+    os.makedirs(CLIP_DIR, exist_ok=True)
+    old = load_index()
+    lengths = clip_lengths()
+    # Un extrait par réglage audio distinct ; un profil sans audio (draft) n'a jamais de musique
+    ids = {audio_id(p): p for p in ENCODE_PROFILES if ENCODE_PROFILES[p]["audio"]}
+    entries = []
+    for path in sorted(p for ext in EXTENSIONS for p in glob.glob(f"{MUSIC_DIR}/*{ext}")):
+        digest = file_digest(path)
+        entry = old.get(path)
+        if not entry or entry.get("sha1") != digest:
+            duration = probe_duration(path)
+            ss = max(DEFAULT_START, round(lead_silence(path), 2))
+            entry = {"file": path, "sha1": digest, "duration": round(duration, 2), "start": ss,
+                     "loudnorm": measure_loudness(path, ss), "clips": {}}
+            print(f"🎵 {path} — {entry['duration']} s, {entry['loudnorm']['input_i']} LUFS, début {ss} s")
+        slug = re.sub(r"[^a-z0-9]+", "_", os.path.splitext(os.path.basename(path))[0].lower()).strip("_")
+        clips_by_len = {}
+        for secs in lengths:
+            if secs > entry["duration"] - entry["start"]:
+                continue  # piste trop courte : la vidéo serait coupée par -shortest
+            clips_by_len[str(secs)] = {}
+            for aid, profile in ids.items():
+                out = os.path.join(CLIP_DIR, f"{slug}_{digest[:8]}_{secs}s_{aid}.m4a")
+                if not os.path.exists(out):
+                    encode_clip(entry, secs, profile, out)
+                clips_by_len[str(secs)][aid] = out
+        entry["clips"] = clips_by_len
+        entries.append(entry)
+
+    # Extraits orphelins (piste retirée, réglages changés)
+    keep = {c for e in entries for by_aid in e["clips"].values() for c in by_aid.values()}
+    for f in glob.glob(os.path.join(CLIP_DIR, "*.m4a")):
+        if f not in keep:
+            os.remove(f)
+
+    with open(MUSIC_INDEX, "w", encoding="utf-8") as f:
+        json.dump({"tracks": entries}, f, ensure_ascii=False, indent=2)
+    n = sum(len(by_aid) for e in entries for by_aid in e["clips"].values())
+    print(f"✅ {len(entries)} pistes indexées, {n} extraits AAC dans {CLIP_DIR}/")
+
+
+if __name__ == "__main__":
+    build()
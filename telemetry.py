@@ -0,0 +1,99 @@
+"""
+telemetry.py — Chronométrage par étape, partagé par bot.py, holy_week.py et render.py
+
+Chaque étape d'une exécution (sélection, mise en page, rendu, encodage, envois)
+est un span : durée, octets transférés, statut HTTP, tentatives, attente. Les
+spans s'imbriquent ; dump() écrit la trace JSON de l'exécution dans TRACE_DIR.
+
+    @telemetry.timed
+    def post_to_facebook(...):
+        r = requests.post(...)
+        telemetry.http(r)
+
+    with telemetry.span("youtube_upload", bytes_sent=size):
+        ...
+"""
+import contextlib
+import datetime
+import functools
+import json
+import os
+import time
+
+TRACE_DIR = os.environ.get("TRACE_DIR", "traces")  # "" = désactivé
+
+_spans = []   # dans l'ordre d'ouverture ; "parent" = indice du span englobant
+_stack = []   # indices des spans ouverts
+_t0 = time.perf_counter()
+
+
+@contextlib.contextmanager
+def span(name, **fields):
+    """Mesure le bloc ; les champs passés ici ou via record()/count() sont conservés."""
+    rec = {"name": name, "parent": _stack[-1] if _stack else None,
+           "start_s": round(time.perf_counter() - _t0, 4), **fields}
+    _spans.append(rec)
+    _stack.append(len(_spans) - 1)
+    t = time.perf_counter()
+    try:
+        yield rec
+    except BaseException as e:
+        rec["error"] = f"{type(e).__name__}: {e}"[:300]
+        raise
+    finally:
+        rec["duration_s"] = round(time.perf_counter() - t, 4)
+        _stack.pop()
+
+
+def timed(fn):
+    """Décorateur : un span au nom de la fonction autour de chaque appel."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with span(fn.__name__):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def record(**fields):
+    """Renseigne le span en cours (sans effet hors de tout span)."""
+    if _stack:
+        _spans[_stack[-1]].update(fields)
+
+
+def count(key, n=1):
+    """Cumule n dans le champ key du span en cours."""
+    if _stack:
+        rec = _spans[_stack[-1]]
+        rec[key] = round(rec.get(key, 0) + n, 4)
+
+
+def http(r):
+    """Requête terminée : statut, octets envoyés et reçus, nombre de requêtes du span."""
+    body = r.request.body if r.request is not None else None
+    if isinstance(body, str):
+        body = body.encode("utf-8")  # octets envoyés, pas caractères
+    count("requests")
+    count("bytes_sent", len(body) if isinstance(body, bytes) else 0)
+    count("bytes_received", len(r.content or b""))
+    record(status=r.status_code)
+    return r
+
+
+def sleep(secs):
+    """time.sleep compté dans le span : l'attente des plateformes se distingue du travail."""
+    time.sleep(secs)
+    count("sleep_s", secs)
+
+
+def dump(name):
+    """Écrit la trace de l'exécution dans TRACE_DIR/<horodatage>_<name>.json et la vide."""
+    if not TRACE_DIR or not _spans:
+        return None
+    os.makedirs(TRACE_DIR, exist_ok=True)
+    stamp = datetime.datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    path = os.path.join(TRACE_DIR, f"{stamp}_{name}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"run": name, "utc": stamp, "spans": _spans}, f, ensure_ascii=False, indent=2)
+    _spans.clear()
+    print(f"📊 Trace : {path}")
+    return path